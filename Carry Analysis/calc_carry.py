@@ -0,0 +1,63 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append("../Kernels")
+import carry
+import curves
+
+
+def dense_cash_flows(bond_df, dates, isins):
+    """
+    Lay the remaining cash flows of every bond in the panel out on a (dates, bonds, periods) grid,
+    with zero cash flows where a bond is not priced or has matured.
+
+    :return: (cash_flows, times)
+    """
+    bond_df = bond_df[bond_df["Maturity Date"] > bond_df["Date"]]
+    date_index = np.searchsorted(dates, bond_df["Date"].values.astype("datetime64[D]"))
+    bond_index = pd.Index(isins).get_indexer(bond_df["ISIN"])
+    cash_flows, times = curves.bond_cash_flows(
+        bond_df["Coupon Rate"].to_numpy(dtype=float),
+        bond_df["Maturity Date"].values.astype("datetime64[D]"),
+        bond_df["Date"].values.astype("datetime64[D]"))
+
+    shape = (len(dates), len(isins), cash_flows.shape[1])
+    dense_cash_flows, dense_times = np.zeros(shape), np.zeros(shape)
+    dense_cash_flows[date_index, bond_index] = cash_flows
+    dense_times[date_index, bond_index] = times
+    return dense_cash_flows, dense_times
+
+
+if __name__ == "__main__":
+    # Load bond dataset and the bootstrapped spot curve
+    bond_df = pd.read_csv("../Data Extract/bond_selection.csv")
+    spot_df = pd.read_csv("../Spot Curve/bootstrapped_spot_rates.csv")
+
+    # Convert date columns to datetime format
+    bond_df["Maturity Date"] = pd.to_datetime(bond_df["Maturity Date"], errors='coerce')
+    bond_df["Date"] = pd.to_datetime(bond_df["Date"], errors='coerce')
+    bond_df = bond_df[pd.notna(bond_df["Maturity Date"]) & pd.notna(bond_df["Date"])]
+
+    # Bond universe, sorted by maturity, and the (dates, bonds) grid
+    universe = bond_df.drop_duplicates(subset="ISIN").sort_values(by=["Maturity Date"])
+    isins = universe["ISIN"].to_numpy()
+    dates = np.unique(bond_df["Date"].values.astype("datetime64[D]"))
+    cash_flows, times = dense_cash_flows(bond_df, dates, isins)
+    pillar_years, pillar_values = curves.curve_pillars(spot_df, "Spot Rate", dates)
+
+    grid = (len(dates), len(isins))
+    names = np.broadcast_to(universe["Name"].to_numpy(), grid)
+    maturities = np.broadcast_to(universe["Maturity Date"].values.astype("datetime64[D]"), grid)
+    valuation_dates = np.broadcast_to(dates[:, None], grid)
+
+    # Carry and roll-down for every date, bond and horizon, under both curve assumptions
+    results = {assumption: carry.carry_rolldown(cash_flows, times, pillar_years, pillar_values,
+                                                assumption=assumption)
+               for assumption in carry.ASSUMPTIONS}
+    carry_df = carry.carry_table(results, names, np.broadcast_to(isins, grid), valuation_dates,
+                                 maturities)
+    carry_df.to_csv("carry_rolldown.csv", index=False)
+
+    print("Carry and roll-down saved to carry_rolldown.csv")
@@ -1,14 +1,141 @@
-import openpyxl
-import pandas as pd
+import csv
+import math
+import os
+from datetime import datetime
 
-# Input and output file paths
-csv_file = "bond_data.csv"  # Replace with your CSV file name
-excel_file = "bond_data.xlsx"  # Replace with desired Excel file name
+import xlsxwriter
 
-# Read the CSV file
-df = pd.read_csv(csv_file)
+# Number formats by column type; columns without a type are written as plain numbers or text
+RATE_FORMAT = "0.000%"
+PRICE_FORMAT = "0.000"
+DATE_FORMAT = "yyyy-mm-dd"
+DATE_INPUT_FORMATS = ["%Y-%m-%d", "%Y-%m-%d %H:%M", "%Y/%m/%d", "%m/%d/%Y"]
 
-# Save to Excel
-df.to_excel(excel_file, index=False)
 
-print(f"File successfully converted to {excel_file}")
+def column_format(header):
+    """
+    Pick the Excel number format of a column from its header.
+    """
+    if "Date" in header:
+        return DATE_FORMAT
+    if any(key in header for key in ["YTM", "Yield", "Rate", "Spread", "Carry", "Roll-Down",
+                                          "Return"]):
+        return RATE_FORMAT
+    if any(key in header for key in ["Close", "Dirty", "Price"]):
+        return PRICE_FORMAT
+    return None
+
+
+def parse_date(text, date_cache):
+    """
+    Parse a date in any of DATE_INPUT_FORMATS, caching results since dates repeat across rows.
+    Returns None if the text is not a date.
+    """
+    if text not in date_cache:
+        date_cache[text] = None
+        for date_format in DATE_INPUT_FORMATS:
+            try:
+                date_cache[text] = datetime.strptime(text, date_format)
+                break
+            except ValueError:
+                continue
+    return date_cache[text]
+
+
+def write_csv_sheet(workbook, sheet_name, csv_file, chart_columns=None):
+    """
+    Stream a CSV file into a new sheet, one row at a time. With the workbook in constant_memory
+    mode each row is flushed to disk as soon as the next one starts.
+
+    :param workbook: xlsxwriter Workbook opened with {"constant_memory": True}
+    :param sheet_name: Name of the new sheet
+    :param csv_file: Path of the CSV file
+    :param chart_columns: Optional list of column headers to draw as lines against the first column
+    :return: Number of data rows written
+    """
+    sheet = workbook.add_worksheet(sheet_name)
+    formats = {number_format: workbook.add_format({"num_format": number_format})
+               for number_format in [RATE_FORMAT, PRICE_FORMAT, DATE_FORMAT]}
+    date_cache = {}
+    n_rows = 0
+
+    with open(csv_file, newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        headers = next(reader)
+        column_formats = [column_format(header) for header in headers]
+        sheet.write_row(0, 0, headers)
+        sheet.freeze_panes(1, 0)
+
+        for row_number, row in enumerate(reader, start=1):
+            for column, (text, number_format) in enumerate(zip(row, column_formats)):
+                if text == "":
+                    continue
+                cell_format = formats.get(number_format)
+                if number_format == DATE_FORMAT:
+                    date = parse_date(text, date_cache)
+                    if date is not None:
+                        sheet.write_datetime(row_number, column, date, cell_format)
+                        continue
+                try:
+                    value = float(text)
+                except ValueError:
+                    value = None
+                # Excel has no NaN or infinity, so keep those as the text in the CSV
+                if value is not None and math.isfinite(value):
+                    sheet.write_number(row_number, column, value, cell_format)
+                else:
+                    sheet.write_string(row_number, column, text)
+            n_rows = row_number
+
+    if chart_columns and n_rows > 0:
+        chart = workbook.add_chart({"type": "line"})
+        chart.set_title({"name": sheet_name})
+        chart.set_x_axis({"name": headers[0]})
+        for header in chart_columns:
+            column = headers.index(header)
+            chart.add_series({
+                "name": [sheet_name, 0, column],
+                "categories": [sheet_name, 1, 0, n_rows, 0],
+                "values": [sheet_name, 1, column, n_rows, column],
+            })
+        sheet.insert_chart(1, len(headers) + 1, chart)
+
+    return n_rows
+
+
+def export_report(excel_file, sheets):
+    """
+    Write several CSV files into one Excel workbook using xlsxwriter's constant_memory mode, so
+    memory use stays flat regardless of the number of rows.
+
+    :param excel_file: Path of the Excel file to create
+    :param sheets: List of (sheet_name, csv_file, chart_columns) tuples; chart_columns may be None.
+                   Missing CSV files are skipped.
+    """
+    workbook = xlsxwriter.Workbook(excel_file, {"constant_memory": True})
+    for sheet_name, csv_file, chart_columns in sheets:
+        if not os.path.exists(csv_file):
+            print(f"Skipping {sheet_name}: {csv_file} not found")
+            continue
+        n_rows = write_csv_sheet(workbook, sheet_name, csv_file, chart_columns)
+        print(f"{sheet_name}: {n_rows} rows")
+    workbook.close()
+
+
+if __name__ == "__main__":
+    # Input and output file paths
+    excel_file = "daily_report.xlsx"  # Replace with desired Excel file name
+    forward_columns = [f"1Y-{n}Y Forward Rate" for n in range(2, 6)]
+    report_sheets = [
+        ("Prices", "bond_selection.csv", None),
+        ("YTM", "../YTM Curve/ytm.csv", None),
+        ("Spot", "../Spot Curve/bootstrapped_spot_rates.csv", None),
+        ("Forward", "../Forward Rate Curve/forward_curve.csv", forward_columns),
+        ("PCA", "../Matrices/pca_results.csv", None),
+        ("Spreads", "../Spread Analysis/spreads.csv", None),
+        ("Carry", "../Carry Analysis/carry_rolldown.csv", None),
+    ]
+
+    export_report(excel_file, report_sheets)
+
+    print(f"File successfully converted to {excel_file}")
@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+
+def accrued_interest(coupon_rate, maturity_day, current_day, face=100):
+    """
+    Compute accrued interest using whole months since the last coupon date, which is the
+    convention used to build the "Dirty" column of bond_selection.csv.
+
+    Parameters:
+    - coupon_rate (float): The annual coupon rate (decimal).
+    - maturity_day (datetime): The final maturity date.
+    - current_day (datetime): The date on which the bond price is observed.
+
+    Returns:
+    - Accrued interest per `face` of notional.
+    """
+    last_coupon = maturity_day
+    while last_coupon > current_day:
+        last_coupon -= relativedelta(months=6)  # Move back 6 months
+    delta = relativedelta(current_day, last_coupon)
+    months = delta.years * 12 + delta.months
+    return coupon_rate * face * months / 12
+
+
+class BondLadderSelector:
+    """
+    Maturity index over a candidate bond universe, used to pick the semi-annual bond ladder
+    that bootstrap_yield_curve needs on each valuation date.
+
+    Bonds are kept in NumPy arrays sorted by maturity, so the bonds falling into a bucket
+    (valuation date + 6k months, valuation date + 6(k+1) months] are found with two binary
+    searches. The candidates of a bucket are ranked once (coupon-date alignment first, then
+    liquidity, then the most recent issue) and the ranking is cached by the bucket's index
+    range. When the valuation date rolls forward only the buckets whose range moved are
+    re-ranked, and matured bonds simply fall off the front of the arrays.
+    """
+
+    def __init__(self, universe, n_buckets=10, anchor_months=None):
+        """
+        :param universe: DataFrame with one row per bond and columns "ISIN", "Name", "Coupon Rate",
+                         "Issue Date", "Maturity Date" and optionally "Volume" (higher is more liquid)
+        :param n_buckets: Number of semi-annual buckets in the ladder (default = 10, i.e. 5 years)
+        :param anchor_months: Pair of maturity months forming the preferred coupon cycle, e.g. (3, 9).
+                              If None, the most common cycle in the universe is used.
+        """
+        self.n_buckets = n_buckets
+        self.isins = np.array([], dtype=object)
+        self.names = np.array([], dtype=object)
+        self.coupons = np.array([], dtype=float)
+        self.issues = np.array([], dtype="datetime64[D]")
+        self.maturities = np.array([], dtype="datetime64[D]")
+        self.volumes = np.array([], dtype=float)
+        self.anchor_months = anchor_months
+        self._rankings = {}
+        self._valuation_date = None
+        self._edges = None
+        self.add_bonds(universe)
+
+    def add_bonds(self, bonds):
+        """
+        Insert new issues into the sorted index without re-sorting the existing universe.
+        Cached rankings whose index range is shifted by the insertion are dropped.
+        """
+        bonds = bonds.drop_duplicates(subset="ISIN")
+        bonds = bonds[~bonds["ISIN"].isin(self.isins)]
+        bonds = bonds[pd.notna(bonds["Maturity Date"])]
+        if bonds.empty:
+            return
+
+        maturities = pd.to_datetime(bonds["Maturity Date"]).values.astype("datetime64[D]")
+        issues = pd.to_datetime(bonds["Issue Date"], errors='coerce').values.astype("datetime64[D]")
+        volumes = bonds["Volume"].to_numpy(dtype=float) if "Volume" in bonds else np.zeros(len(bonds))
+
+        order = np.argsort(maturities, kind="stable")
+        positions = np.searchsorted(self.maturities, maturities[order], side="right")
+
+        self.isins = np.insert(self.isins, positions, bonds["ISIN"].to_numpy(dtype=object)[order])
+        self.names = np.insert(self.names, positions, bonds["Name"].to_numpy(dtype=object)[order])
+        self.coupons = np.insert(self.coupons, positions,
+                                 bonds["Coupon Rate"].to_numpy(dtype=float)[order])
+        self.issues = np.insert(self.issues, positions, issues[order])
+        self.maturities = np.insert(self.maturities, positions, maturities[order])
+        self.volumes = np.insert(self.volumes, positions, volumes[order])
+
+        if self.anchor_months is None:
+            self.anchor_months = self._most_common_cycle()
+
+        # Only rankings at or after the first insertion point have moved
+        first_position = positions.min()
+        self._rankings = {key: ranking for key, ranking in self._rankings.items()
+                          if key[1] <= first_position}
+        self._edges = None
+
+    def _most_common_cycle(self):
+        months = self.maturities.astype("datetime64[M]").astype(int) % 12 + 1
+        cycles = (months - 1) % 6 + 1  # Map e.g. March and September both to 3
+        first_month = int(np.bincount(cycles, minlength=7)[1:].argmax()) + 1
+        return first_month, first_month + 6
+
+    def _bucket_edges(self, valuation_date):
+        valuation_date = pd.Timestamp(valuation_date)
+        edges = [valuation_date + relativedelta(months=6 * k) for k in range(self.n_buckets + 1)]
+        return np.array(edges, dtype="datetime64[D]")
+
+    def _rank(self, lo, hi):
+        """
+        Rank the candidates in index range [lo, hi) from most to least preferred.
+        """
+        if (lo, hi) in self._rankings:
+            return self._rankings[(lo, hi)]
+
+        months = self.maturities[lo:hi].astype("datetime64[M]").astype(int) % 12 + 1
+        aligned = np.isin(months, self.anchor_months)
+        # np.lexsort sorts by the last key first; negate so larger is preferred
+        issue_days = self.issues[lo:hi].astype("datetime64[D]").astype(float)
+        ranking = lo + np.lexsort((-issue_days, -self.volumes[lo:hi], ~aligned))
+        self._rankings[(lo, hi)] = ranking
+        return ranking
+
+    def roll_to(self, valuation_date):
+        """
+        Move the ladder to a new valuation date. Only buckets whose index range changed are
+        re-ranked; rankings for buckets that no longer exist are released.
+        """
+        edges = self._bucket_edges(valuation_date)
+        bounds = np.searchsorted(self.maturities, edges, side="right")
+        live = set(zip(bounds[:-1], bounds[1:]))
+        self._rankings = {key: ranking for key, ranking in self._rankings.items() if key in live}
+        self._valuation_date = pd.Timestamp(valuation_date)
+        self._edges = bounds
+
+    def ladder(self, valuation_date, available=None):
+        """
+        Pick one bond per semi-annual bucket for the given valuation date.
+
+        :param valuation_date: The date on which the ladder is built
+        :param available: Optional set of ISINs that have a price on the valuation date
+        :return: Array of universe indices, one per bucket (-1 for empty buckets)
+        """
+        if self._edges is None or pd.Timestamp(valuation_date) != self._valuation_date:
+            self.roll_to(valuation_date)
+
+        picks = np.full(self.n_buckets, -1)
+        for k in range(self.n_buckets):
+            lo, hi = self._edges[k], self._edges[k + 1]
+            if lo == hi:
+                continue
+            for index in self._rank(lo, hi):
+                if available is None or self.isins[index] in available:
+                    picks[k] = index
+                    break
+        return picks
+
+
+def select_bonds(price_df, n_buckets=10, anchor_months=None):
+    """
+    Build the bond_selection panel from a scraped price panel by picking the bond ladder
+    for every valuation date.
+
+    :param price_df: DataFrame in the format written by extract_data_script.scraper
+    :return: DataFrame in the format of bond_selection.csv
+    """
+    price_df = price_df.copy()
+    price_df["Maturity Date"] = pd.to_datetime(price_df["Maturity Date"], errors='coerce')
+    price_df["Date"] = pd.to_datetime(price_df["Date"], errors='coerce')
+    price_df = price_df[pd.notna(price_df["Maturity Date"]) & pd.notna(price_df["Date"])]
+
+    selector = BondLadderSelector(price_df, n_buckets=n_buckets, anchor_months=anchor_months)
+
+    selected = []
+    # One pass over the panel instead of a full scan per date
+    for date, daily_bond_data in price_df.groupby("Date", sort=True):
+        daily_bond_data = daily_bond_data.drop_duplicates(subset="ISIN")
+        picks = selector.ladder(date, available=set(daily_bond_data["ISIN"]))
+        picked_isins = selector.isins[picks[picks >= 0]]
+        selected.append(daily_bond_data.set_index("ISIN").loc[picked_isins].reset_index())
+
+    selection_df = pd.concat(selected, ignore_index=True)
+    if "Dirty" not in selection_df:
+        selection_df["Dirty"] = [
+            close + accrued_interest(coupon, maturity_day, current_day)
+            for close, coupon, maturity_day, current_day in zip(
+                selection_df["Close"], selection_df["Coupon Rate"],
+                selection_df["Maturity Date"], selection_df["Date"])]
+
+    # Keep the bond_selection.csv layout: bonds grouped together, ordered by maturity
+    selection_df = selection_df.sort_values(by=["Maturity Date", "ISIN", "Date"], kind="stable")
+    return selection_df[["Name", "ISIN", "Coupon Rate", "Issue Date", "Maturity Date", "Date",
+                         "Close", "Dirty"]]
+
+
+if __name__ == "__main__":
+    # Input and output file paths
+    input_file = "bond_data.csv"  # Output of extract_data_script.py
+    output_file = "bond_selection.csv"
+
+    bond_df = pd.read_csv(input_file)
+    selection_df = select_bonds(bond_df)
+    selection_df.to_csv(output_file, index=False)
+
+    print(f"Selected {selection_df['ISIN'].nunique()} bonds saved to {output_file}")
@@ -0,0 +1,81 @@
+import time
+
+import numpy as np
+
+import kernels
+
+
+def synthetic_universe(n_bonds, seed=0):
+    """
+    Generate random bonds with 1-60 remaining semi-annual periods, coupons between 0.5% and 5%
+    and prices implied by yields between 0.5% and 8%.
+
+    :return: (prices, coupons, n_periods, yields)
+    """
+    rng = np.random.default_rng(seed)
+    n_periods = rng.integers(1, 61, n_bonds).astype(float)
+    coupons = rng.uniform(0.5, 5.0, n_bonds)
+    yields = rng.uniform(0.005, 0.08, n_bonds)
+    # Price with the NumPy closed form directly, leaving the selected backend and precision alone
+    prices = kernels._numpy_bond_price(yields, coupons, n_periods)
+    return prices, coupons, n_periods, yields
+
+
+def synthetic_ladder(n_dates, n_bonds, seed=0):
+    """
+    Generate a semi-annual bond ladder per date, in the layout taken by
+    kernels.bootstrap_spot_rates.
+    """
+    rng = np.random.default_rng(seed)
+    first_period = rng.uniform(0.01, 0.5, n_dates)
+    time_periods = first_period[:, None, None] + 0.5 * np.arange(n_bonds)[None, None, :]
+    time_periods = np.broadcast_to(time_periods, (n_dates, n_bonds, n_bonds)).copy()
+    n_periods = np.broadcast_to(np.arange(1, n_bonds + 1), (n_dates, n_bonds)).copy()
+    coupons = rng.uniform(0.005, 0.05, (n_dates, n_bonds))
+    prices = 100 + 100 * (coupons - 0.03) * n_periods / 2 + rng.normal(0, 0.2, (n_dates, n_bonds))
+    return prices, coupons, time_periods, n_periods
+
+
+def time_call(func, *args, repeat=3):
+    """
+    Return the best wall time of `repeat` calls and the result of the last call.
+    """
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    prices, coupons, n_periods, yields = synthetic_universe(20000)
+    ladder = synthetic_ladder(2500, 20)
+
+    results = {}
+    for backend in kernels.BACKENDS:
+        kernels.set_backend(backend)
+
+        # The first call includes compilation, or loading it from the on-disk cache
+        start = time.perf_counter()
+        kernels.bond_ytm(prices[:1], coupons[:1], n_periods[:1])
+        kernels.bootstrap_spot_rates(*[array[:1] for array in ladder])
+        warmup = time.perf_counter() - start
+
+        ytm_time, ytms = time_call(kernels.bond_ytm, prices, coupons, n_periods)
+        price_time, _ = time_call(kernels.bond_price, yields, coupons, n_periods)
+        bootstrap_time, (spot_rates, _) = time_call(kernels.bootstrap_spot_rates, *ladder)
+        results[backend] = (ytms, spot_rates)
+
+        print(f"Backend: {backend}")
+        print(f"  first call (compile/cache load): {warmup:.3f}s")
+        print(f"  bond_price, {len(yields)} bonds: {price_time * 1000:.2f}ms")
+        print(f"  bond_ytm, {len(prices)} bonds: {ytm_time * 1000:.2f}ms")
+        print(f"  bootstrap_spot_rates, {ladder[0].shape[0]} dates x {ladder[0].shape[1]} bonds: "
+              f"{bootstrap_time * 1000:.2f}ms")
+        print(f"  max YTM error vs. true yield: {np.nanmax(np.abs(ytms - yields)):.2e}")
+
+    if len(results) == 2:
+        print("Max difference between backends:")
+        print(f"  YTM: {np.nanmax(np.abs(results['numba'][0] - results['numpy'][0])):.2e}")
+        print(f"  spot rates: {np.nanmax(np.abs(results['numba'][1] - results['numpy'][1])):.2e}")
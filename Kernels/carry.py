@@ -0,0 +1,165 @@
+"""
+Carry and roll-down of bonds priced off the spot curve, for every (date, bond, horizon) at once.
+
+Over a horizon h, a bond's total return splits into
+
+    carry       the return if the bond's own yield stays unchanged: coupons received plus the
+                pull of the price towards par as the remaining cash flows come h years closer
+    roll-down   the extra price change from the yield moving to the horizon yield
+
+where the horizon curve follows one of two assumptions:
+
+    unchanged   the spot curve keeps its shape, so a cash flow due in t - h years at the horizon
+                is discounted at today's (t - h)-year spot rate
+    forwards    today's forward rates are realised, so the horizon discount factors are
+                P(t) / P(h); every bond then earns the h-year spot rate
+
+Coupons received before the horizon are reinvested to the horizon on the same curve.
+"""
+import numpy as np
+import pandas as pd
+
+import curves
+
+# Horizons in years, keyed by the label written to the outputs
+HORIZONS = {"1M": 1 / 12, "3M": 0.25, "1Y": 1.0}
+ASSUMPTIONS = ("unchanged", "forwards")
+
+
+def carry_rolldown(cash_flows, times, pillar_years, pillar_values, horizons=None,
+                   assumption="unchanged", compounding_frequency=2):
+    """
+    Compute carry and roll-down over (dates, bonds, horizons) by broadcasting the cash flow grid
+    against the horizons.
+
+    :param cash_flows: (dates, bonds, periods) array of cash flows, 0 after the last payment and
+                       for bonds not priced on a date
+    :param times: (dates, bonds, periods) array of cash flow times in years
+    :param pillar_years: (dates, pillars) spot curve maturities, see curves.curve_pillars
+    :param pillar_values: (dates, pillars) spot rates
+    :param horizons: Sequence of horizons in years (default: the values of HORIZONS)
+    :param assumption: "unchanged" or "forwards"
+    :return: dict of arrays: "price" and "yield" (dates, bonds); "horizon_price",
+             "horizon_yield", "carry", "roll_down" and "total_return" (dates, bonds, horizons).
+             Returns are fractions of today's price; yields are semi-annual. Bonds maturing
+             within a horizon have NaN horizon yields.
+    """
+    if assumption not in ASSUMPTIONS:
+        raise ValueError(f"Unknown assumption {assumption!r}, expected one of {ASSUMPTIONS}.")
+    if horizons is None:
+        horizons = list(HORIZONS.values())
+    f = compounding_frequency
+    n_dates, n_bonds, n_periods = np.shape(cash_flows)
+    date_index = np.arange(n_dates)
+
+    # Today: (dates, bonds, 1, periods) so that everything below broadcasts against the horizons
+    cash_flows = np.asarray(cash_flows, dtype=float)[:, :, None, :]
+    times = np.asarray(times, dtype=float)[:, :, None, :]
+    h = np.asarray(horizons, dtype=float)[None, None, :, None]
+    spot_rates = curves.interpolate_curve(pillar_years, pillar_values, date_index, times)
+    discount = (1 + spot_rates / f) ** (-f * times)
+    price = np.sum(np.where(cash_flows != 0, cash_flows * discount, 0.0), axis=-1)
+
+    remaining = (cash_flows != 0) & (times > h)
+    received = (cash_flows != 0) & (times <= h)
+    time_left = np.where(remaining, times - h, 0.0)
+
+    if assumption == "unchanged":
+        horizon_discount = (1 + curves.interpolate_curve(pillar_years, pillar_values, date_index,
+                                                         time_left) / f) ** (-f * time_left)
+        reinvested_time = np.where(received, h - times, 0.0)
+        growth = (1 + curves.interpolate_curve(pillar_years, pillar_values, date_index,
+                                               reinvested_time) / f) ** (f * reinvested_time)
+    else:
+        horizon_years = np.broadcast_to(h, (n_dates, 1, len(horizons), 1))
+        horizon_spot = curves.interpolate_curve(pillar_years, pillar_values, date_index,
+                                                horizon_years)
+        # P(t) / P(h) both discounts cash flows after the horizon and grows those before it
+        horizon_discount = discount / (1 + horizon_spot / f) ** (-f * h)
+        growth = horizon_discount
+
+    horizon_price = np.sum(np.where(remaining, cash_flows * horizon_discount, 0.0), axis=-1)
+    income = np.sum(np.where(received, cash_flows * growth, 0.0), axis=-1)
+
+    # Yields on the bond's own schedule, solved as spreads over a zero curve
+    priced = price[..., 0] > 0
+    yields = curves.solve_z_spreads(cash_flows.reshape(-1, n_periods),
+                                    times.reshape(-1, n_periods), 0.0,
+                                    np.where(priced, price[..., 0], np.nan).ravel(), f)
+    yields = yields.reshape(n_dates, n_bonds)
+
+    remaining_cash_flows = np.where(remaining, cash_flows, 0.0)
+    remaining_cash_flows = np.broadcast_to(remaining_cash_flows,
+                                           (n_dates, n_bonds, len(horizons), n_periods))
+    has_remaining = remaining.any(axis=-1)
+    horizon_yields = curves.solve_z_spreads(
+        remaining_cash_flows.reshape(-1, n_periods),
+        np.broadcast_to(time_left, remaining_cash_flows.shape).reshape(-1, n_periods), 0.0,
+        np.where(has_remaining, horizon_price, np.nan).ravel(), f)
+    horizon_yields = horizon_yields.reshape(n_dates, n_bonds, len(horizons))
+
+    # Horizon price had the yield stayed at today's level
+    unchanged_yield_price = curves.discount_cash_flows(remaining_cash_flows, time_left,
+                                                       yields[:, :, None, None], 0.0, f)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        carry = (unchanged_yield_price + income) / price - 1
+        roll_down = (horizon_price - unchanged_yield_price) / price
+    valid = priced[..., None]
+    return {
+        "price": np.where(priced, price[..., 0], np.nan),
+        "yield": yields,
+        "horizon_price": np.where(valid, horizon_price, np.nan),
+        "horizon_yield": horizon_yields,
+        "carry": np.where(valid, carry, np.nan),
+        "roll_down": np.where(valid, roll_down, np.nan),
+        "total_return": np.where(valid, carry + roll_down, np.nan),
+    }
+
+
+# Column layout of carry_rolldown.csv
+CARRY_COLUMNS = ["Bond Name", "ISIN", "Date", "Maturity Date", "Horizon", "Assumption", "Price",
+                 "Yield", "Horizon Price", "Horizon Yield", "Yield Change", "Carry", "Roll-Down",
+                 "Total Return"]
+
+
+def carry_table(results, names, isins, dates, maturities, horizon_labels=None):
+    """
+    Flatten the output of carry_rolldown under one or more assumptions into rows of
+    carry_rolldown.csv, ordered by date, maturity, assumption and horizon, and skipping bonds not
+    priced on a date.
+
+    :param results: dict of assumption -> dict returned by carry_rolldown for that assumption
+    :param names: (dates, bonds) array of bond names
+    :param isins: (dates, bonds) array of ISINs
+    :param dates: (dates, bonds) array of valuation dates
+    :param maturities: (dates, bonds) array of maturity dates
+    :param horizon_labels: Labels of the horizons (default: the keys of HORIZONS)
+    :return: DataFrame with CARRY_COLUMNS
+    """
+    if horizon_labels is None:
+        horizon_labels = list(HORIZONS)
+    assumptions = list(results)
+    # Prices and yields today do not depend on the assumption
+    today = results[assumptions[0]]
+    date_index, bond_index = np.nonzero(np.isfinite(today["price"]))
+    n_rows = len(date_index)
+    rows_per_bond = len(assumptions) * len(horizon_labels)
+
+    def per_bond(array):
+        return np.repeat(np.asarray(array)[date_index, bond_index], rows_per_bond)
+
+    def per_horizon(key):
+        # (bonds, assumptions, horizons), flattened in that order
+        return np.stack([results[assumption][key][date_index, bond_index]
+                         for assumption in assumptions], axis=1).ravel()
+
+    return pd.DataFrame(dict(zip(CARRY_COLUMNS, [
+        per_bond(names), per_bond(isins), per_bond(dates), per_bond(maturities),
+        np.tile(np.array(horizon_labels, dtype=object), n_rows * len(assumptions)),
+        np.tile(np.repeat(np.array(assumptions, dtype=object), len(horizon_labels)), n_rows),
+        per_bond(today["price"]), per_bond(today["yield"]),
+        per_horizon("horizon_price"), per_horizon("horizon_yield"),
+        per_horizon("horizon_yield") - per_bond(today["yield"]),
+        per_horizon("carry"), per_horizon("roll_down"), per_horizon("total_return"),
+    ])))
@@ -0,0 +1,179 @@
+"""
+Helpers for pricing bond cash flows off the curves written by the pipeline (bootstrapped spot
+rates and YTMs, both quoted per bond maturity), shared by the spread and carry stages.
+"""
+import numpy as np
+import pandas as pd
+
+import schedule
+
+
+def curve_pillars(curve_df, value_column, dates):
+    """
+    Turn a long-format curve file (one row per bond and date) into padded pillar arrays.
+
+    :param curve_df: DataFrame with "Date", "Maturity Date" and `value_column` columns
+    :param value_column: Curve value column, e.g. "Spot Rate" or "YTM"
+    :param dates: Valuation dates (datetime64[D]) to build curves for
+    :return: (pillar_years, pillar_values), both (dates, pillars) arrays sorted by maturity and
+             padded with NaN; dates without a curve are all NaN
+    """
+    curve_df = curve_df[pd.notna(curve_df[value_column])].copy()
+    curve_df["Date"] = pd.to_datetime(curve_df["Date"]).values.astype("datetime64[D]")
+    curve_df["Maturity Date"] = pd.to_datetime(curve_df["Maturity Date"])
+    curve_df["Years"] = (curve_df["Maturity Date"] - pd.to_datetime(curve_df["Date"])).dt.days / 365
+    curve_df = curve_df.sort_values(by=["Date", "Years"])
+
+    groups = dict(list(curve_df.groupby("Date")))
+    n_pillars = max([len(group) for group in groups.values()], default=1)
+    pillar_years = np.full((len(dates), n_pillars), np.nan)
+    pillar_values = np.full((len(dates), n_pillars), np.nan)
+    for d, date in enumerate(dates):
+        group = groups.get(pd.Timestamp(date))
+        if group is not None:
+            pillar_years[d, :len(group)] = group["Years"].to_numpy()
+            pillar_values[d, :len(group)] = group[value_column].to_numpy(dtype=float)
+    return pillar_years, pillar_values
+
+
+def interpolate_curve(pillar_years, pillar_values, date_index, query_years):
+    """
+    Linearly interpolate each date's curve at the query times, extrapolating flat beyond the first
+    and last pillars, as np.interp does for a single curve.
+
+    All dates are searched at once: the pillars are flattened into one sorted integer key, date
+    index times a span wider than any curve plus the rank of the pillar time among all pillar
+    times, so each query only ever lands among the pillars of its own date and compares exactly
+    against them, whichever dates are searched together.
+
+    :param pillar_years: (dates, pillars) array from curve_pillars, sorted along each row
+    :param pillar_values: (dates, pillars) array from curve_pillars
+    :param date_index: Index of each query's valuation date in the pillar arrays, with the shape of
+                       the leading axes of query_years
+    :param query_years: Array of times in years
+    :return: Array shaped like query_years; NaN where the date has no curve
+    """
+    query_years = np.asarray(query_years, dtype=float)
+    date_index = np.asarray(date_index)
+    date_index = np.broadcast_to(
+        date_index.reshape(date_index.shape + (1,) * (query_years.ndim - date_index.ndim)),
+        query_years.shape)
+
+    valid = np.isfinite(pillar_years) & np.isfinite(pillar_values)
+    if not valid.any():
+        return np.full(query_years.shape, np.nan)
+    pillar_dates, _ = np.nonzero(valid)
+    years, values = pillar_years[valid], pillar_values[valid]
+    grid = np.unique(years)
+    span = len(grid) + 1
+    keys = pillar_dates * span + np.searchsorted(grid, years, side="right")
+
+    dates = np.arange(len(pillar_years))
+    starts = np.searchsorted(pillar_dates, dates, side="left")[date_index]
+    ends = np.searchsorted(pillar_dates, dates, side="right")[date_index]
+    has_curve = ends > starts
+    last = np.maximum(ends - 1, 0)
+    first = np.minimum(starts, last)
+
+    query = np.clip(query_years, years[first], years[last])
+    right = np.searchsorted(keys, date_index * span + np.searchsorted(grid, query, side="right"),
+                            side="right")
+    right = np.clip(right, np.minimum(starts + 1, last), last)
+    left = np.clip(right - 1, first, last)
+
+    width = years[right] - years[left]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Between repeated pillar times take the later pillar, as np.interp does
+        weight = np.where(width > 0, (query - years[left]) / width, 1.0)
+    interpolated = values[left] + weight * (values[right] - values[left])
+    # Below the curve, extrapolate from the first pillar even when its time is repeated
+    interpolated = np.where(query_years < years[first], values[first], interpolated)
+    return np.where(has_curve & ~np.isnan(query_years), interpolated, np.nan)
+
+
+def coupon_cash_flows(coupon_rates, n_periods, max_periods, face=100):
+    """
+    Cash flows of bonds paying semi-annual coupons over n_periods remaining periods, plus face at
+    the last one, padded with 0 to max_periods.
+
+    :return: Array of shape coupon_rates.shape + (max_periods,)
+    """
+    n_periods = np.asarray(n_periods)
+    periods = np.arange(max_periods)
+    coupon = (np.asarray(coupon_rates, dtype=float) * face / 2)[..., None]
+    cash_flows = np.where(periods < n_periods[..., None], coupon, 0.0)
+    cash_flows += np.where(periods == n_periods[..., None] - 1, face, 0.0)
+    return cash_flows
+
+
+def bond_cash_flows(coupon_rates, maturity, current, face=100):
+    """
+    Remaining cash flows of each bond on its coupon date grid, from schedule.coupon_periods.
+
+    :param coupon_rates: Array of annual coupon rates (decimal)
+    :param maturity: Array of maturity dates (datetime64)
+    :param current: Array of valuation dates (datetime64)
+    :return: (cash_flows, times), both arrays with an extra trailing periods axis, padded with 0
+             after the last payment
+    """
+    first_period, n_periods = schedule.coupon_periods(maturity, current)
+    times = schedule.time_period_matrix(first_period, n_periods)
+    return coupon_cash_flows(coupon_rates, n_periods, times.shape[-1], face), times
+
+
+def discount_cash_flows(cash_flows, times, rates, spread=0.0, compounding_frequency=2):
+    """
+    Present value of cash flows discounted at rates + spread with the given compounding, summed
+    over the last axis. All inputs broadcast against each other.
+    """
+    discount = (1 + (rates + spread) / compounding_frequency) ** (-compounding_frequency * times)
+    return np.sum(np.where(cash_flows != 0, cash_flows * discount, 0.0), axis=-1)
+
+
+def solve_z_spreads(cash_flows, times, spot_rates, prices, compounding_frequency=2, low=-0.05,
+                    high=1.0, tolerance=1e-10, max_iterations=100):
+    """
+    Solve the Z-spread of every bond at once: the constant spread z over the spot curve such that
+
+        price = sum_j cash_flow_j * (1 + (spot_j + z) / f) ** (-f * t_j)
+
+    Newton steps are taken for all bonds together; a bond whose step leaves its bracket is bisected
+    instead, so every bond with a root in [low, high] converges.
+
+    :param cash_flows: (bonds, periods) array of cash flows, 0 after the last payment
+    :param times: (bonds, periods) array of cash flow times in years
+    :param spot_rates: (bonds, periods) array of spot rates at the cash flow times
+    :param prices: (bonds,) array of dirty prices
+    :return: (bonds,) array of Z-spreads, NaN where there is no root in [low, high]
+    """
+    prices = np.asarray(prices, dtype=float)
+    f = compounding_frequency
+
+    def pricing_error(z):
+        return discount_cash_flows(cash_flows, times, spot_rates, z[:, None], f) - prices
+
+    lower = np.full(prices.shape, float(low))
+    upper = np.full(prices.shape, float(high))
+    # The pricing error decreases with the spread, so a root needs error(low) >= 0 >= error(high)
+    bracketed = (pricing_error(lower) >= 0) & (pricing_error(upper) <= 0)
+
+    z = np.where(bracketed, 0.0, np.nan)
+    z = np.clip(z, lower, upper)
+    for _ in range(max_iterations):
+        base = 1 + (spot_rates + z[:, None]) / f
+        error = np.sum(np.where(cash_flows != 0, cash_flows * base ** (-f * times), 0.0),
+                       axis=-1) - prices
+        slope = -np.sum(np.where(cash_flows != 0, cash_flows * times * base ** (-f * times - 1),
+                                 0.0), axis=-1)
+        converged = ~bracketed | (np.abs(error) <= tolerance * prices)
+        if converged.all():
+            break
+
+        lower = np.where(error > 0, z, lower)
+        upper = np.where(error < 0, z, upper)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = z - error / slope
+        inside = np.isfinite(step) & (step > lower) & (step < upper)
+        z = np.where(converged, z, np.where(inside, step, (lower + upper) / 2))
+
+    return np.where(bracketed, z, np.nan)
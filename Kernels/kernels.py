@@ -0,0 +1,315 @@
+"""
+Array kernels for bond pricing, YTM solving and spot-rate bootstrapping.
+
+Two backends implement the same kernels:
+- "numba": @njit loops, compiled on first use and cached on disk (in __pycache__ next to
+  this file) so later runs skip compilation.
+- "numpy": vectorized NumPy, used when Numba is not installed.
+
+The backend is picked at import time from the APM466_BACKEND environment variable
+("auto", "numba" or "numpy", default "auto") and can be changed with set_backend.
+
+The floating point precision is picked the same way from APM466_PRECISION ("float64", the
+default, or "float32") and can be changed with set_precision. The NumPy backend computes in the
+selected precision throughout; the Numba backend stores inputs and outputs in it but promotes
+intermediate arithmetic to float64. reference.py holds an mpmath implementation used to measure
+the resulting errors (see precision_report.py).
+"""
+import os
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# YTM search grid used by calc_ytm.bond_ytm: 0% to 20% in steps of 1bp
+YTM_GRID_LOW = 0.0
+YTM_GRID_HIGH = 0.20
+YTM_GRID_POINTS = 2001
+
+# Bootstrap status flags, one per bond
+BOOTSTRAP_OK = 0
+BOOTSTRAP_INVALID_PRICE = 1
+BOOTSTRAP_LOW_RESIDUAL = 2
+
+# Number of bonds priced against the YTM grid at once by the NumPy backend
+NUMPY_YTM_CHUNK = 1024
+
+
+# ---------------------------------------------------------------------------------------------
+# NumPy backend
+# ---------------------------------------------------------------------------------------------
+
+def _numpy_bond_price(y, coupon, n_periods, face=100.0):
+    """
+    Price bonds from their yields with semi-annual compounding, using the closed form of
+    sum((coupon / 2) / (1 + y / 2) ** i for i in 1..N) + face / (1 + y / 2) ** N.
+    All inputs broadcast against each other.
+    """
+    r = y / 2
+    discount = (1 + r) ** -n_periods
+    safe_r = np.where(r != 0, r, 1)
+    annuity = np.where(r != 0, (1 - discount) / safe_r, n_periods)
+    return (coupon / 2) * annuity + face * discount
+
+
+def _numpy_bond_ytm(price, coupon, n_periods, face=100.0):
+    """
+    Solve YTMs by scanning the yield grid for the first price crossing and interpolating
+    linearly between the two bracketing grid points. Bonds without a crossing get NaN.
+    """
+    grid = np.linspace(YTM_GRID_LOW, YTM_GRID_HIGH, YTM_GRID_POINTS, dtype=price.dtype)
+    ytm = np.full(len(price), np.nan, dtype=price.dtype)
+
+    for start in range(0, len(price), NUMPY_YTM_CHUNK):
+        chunk = slice(start, start + NUMPY_YTM_CHUNK)
+        grid_prices = _numpy_bond_price(grid[:, None], coupon[None, chunk],
+                                        n_periods[None, chunk], face)
+        diff = grid_prices - price[None, chunk]
+        # A price landing exactly on a grid point counts as a crossing at that point
+        crossing = (diff[:-1] * diff[1:] < 0) | (diff[:-1] == 0)
+        found = crossing.any(axis=0)
+        i = crossing.argmax(axis=0)
+        columns = np.arange(grid_prices.shape[1])
+        p0, p1 = grid_prices[i, columns], grid_prices[i + 1, columns]
+        interpolated = grid[i] + (grid[i + 1] - grid[i]) * (price[chunk] - p0) / (p1 - p0)
+        ytm[chunk] = np.where(found, interpolated, np.nan)
+
+    return ytm
+
+
+def _numpy_bootstrap(prices, coupons, time_periods, n_periods, compounding_frequency=2):
+    """
+    Bootstrap spot rates for a batch of dates. The loop runs over the bond pillars, which are
+    sequentially dependent, and every step is vectorized across dates.
+    """
+    n_dates, n_bonds, max_periods = time_periods.shape
+    spot_rates = np.zeros((n_dates, max(n_bonds, max_periods)), dtype=prices.dtype)
+    flags = np.zeros((n_dates, n_bonds), dtype=np.int8)
+    rows = np.arange(n_dates)
+    periods = np.arange(max_periods)
+
+    for i in range(n_bonds):
+        price = prices[:, i]
+        coupon_payment = coupons[:, i] * 100
+        n = n_periods[:, i]
+        last_time = time_periods[rows, i, n - 1]
+        final_cash_flow = 100 + coupon_payment / 2
+
+        # Discount the earlier coupons with the spot rates bootstrapped so far
+        earlier = periods[None, :] < (n - 1)[:, None]
+        discount = (1 + spot_rates[:, :max_periods] / compounding_frequency) ** \
+            (compounding_frequency * np.where(earlier, time_periods[:, i, :], 0))
+        discounted_cash_flows = np.where(earlier, (coupon_payment / 2)[:, None] / discount,
+                                         0).sum(axis=1)
+
+        residual = price - discounted_cash_flows
+        low_residual = (n > 1) & (residual <= 0)
+        # Keep NaN residuals (from an earlier invalid pillar) so that NaN carries through
+        safe_residual = np.where(residual <= 0, 1, residual)
+        spot_rate = compounding_frequency * (
+            (final_cash_flow / safe_residual) ** (1 / (compounding_frequency * last_time)) - 1)
+        # Use previous spot rate as an approximation
+        spot_rate = np.where(low_residual, spot_rates[:, i - 1] if i > 0 else 0.0, spot_rate)
+
+        invalid = price <= 0
+        spot_rates[:, i] = np.where(invalid, np.nan, spot_rate)
+        flags[:, i] = np.where(invalid, BOOTSTRAP_INVALID_PRICE,
+                               np.where(low_residual, BOOTSTRAP_LOW_RESIDUAL, BOOTSTRAP_OK))
+
+    return spot_rates[:, :n_bonds], flags
+
+
+# ---------------------------------------------------------------------------------------------
+# Numba backend
+# ---------------------------------------------------------------------------------------------
+
+if HAS_NUMBA:
+    @njit(cache=True, error_model="numpy")
+    def _numba_price_one(y, coupon, n_periods, face):
+        r = y / 2
+        discount = (1 + r) ** -n_periods
+        if r != 0:
+            annuity = (1 - discount) / r
+        else:
+            annuity = n_periods
+        return (coupon / 2) * annuity + face * discount
+
+    @njit(cache=True, error_model="numpy")
+    def _numba_bond_price(y, coupon, n_periods, face):
+        out = np.empty_like(y)
+        for k in range(len(y)):
+            out[k] = _numba_price_one(y[k], coupon[k], n_periods[k], face)
+        return out
+
+    @njit(cache=True, error_model="numpy")
+    def _numba_bond_ytm(price, coupon, n_periods, face):
+        grid = np.linspace(YTM_GRID_LOW, YTM_GRID_HIGH, YTM_GRID_POINTS)
+        out = np.empty_like(price)
+        out[:] = np.nan
+        for k in range(len(price)):
+            p0 = _numba_price_one(grid[0], coupon[k], n_periods[k], face)
+            for i in range(len(grid) - 1):
+                p1 = _numba_price_one(grid[i + 1], coupon[k], n_periods[k], face)
+                # Detect price crossing, or a price landing exactly on a grid point
+                if (p0 - price[k]) * (p1 - price[k]) < 0 or p0 == price[k]:
+                    out[k] = grid[i] + (grid[i + 1] - grid[i]) * (price[k] - p0) / (p1 - p0)
+                    break
+                p0 = p1
+        return out
+
+    @njit(cache=True, error_model="numpy")
+    def _numba_bootstrap(prices, coupons, time_periods, n_periods, compounding_frequency):
+        n_dates, n_bonds, max_periods = time_periods.shape
+        spot_rates = np.zeros((n_dates, max(n_bonds, max_periods)), prices.dtype)
+        flags = np.zeros((n_dates, n_bonds), dtype=np.int8)
+
+        for d in range(n_dates):
+            for i in range(n_bonds):
+                price = prices[d, i]
+                if price <= 0:
+                    spot_rates[d, i] = np.nan
+                    flags[d, i] = BOOTSTRAP_INVALID_PRICE
+                    continue
+
+                coupon_payment = coupons[d, i] * 100
+                n = n_periods[d, i]
+                last_time = time_periods[d, i, n - 1]
+                final_cash_flow = 100 + coupon_payment / 2
+
+                discounted_cash_flows = 0.0
+                for j in range(n - 1):
+                    discounted_cash_flows += (coupon_payment / 2) / (
+                        (1 + spot_rates[d, j] / compounding_frequency) **
+                        (compounding_frequency * time_periods[d, i, j]))
+
+                residual = price - discounted_cash_flows
+                if n > 1 and residual <= 0:
+                    flags[d, i] = BOOTSTRAP_LOW_RESIDUAL
+                    # Use previous spot rate as an approximation
+                    spot_rates[d, i] = spot_rates[d, i - 1] if i > 0 else 0.0
+                else:
+                    spot_rates[d, i] = compounding_frequency * (
+                        (final_cash_flow / residual) ** (1 / (compounding_frequency * last_time)) - 1)
+
+        return spot_rates[:, :n_bonds], flags
+
+
+# ---------------------------------------------------------------------------------------------
+# Backend dispatch
+# ---------------------------------------------------------------------------------------------
+
+BACKENDS = ("numba", "numpy") if HAS_NUMBA else ("numpy",)
+BACKEND = None
+
+PRECISIONS = {"float32": np.float32, "float64": np.float64}
+PRECISION = None
+
+
+def set_backend(name="auto"):
+    """
+    Select the kernel backend: "numba", "numpy", or "auto" (Numba when installed).
+    """
+    global BACKEND
+    if name == "auto":
+        name = "numba" if HAS_NUMBA else "numpy"
+    if name not in BACKENDS:
+        raise ValueError(f"Kernel backend {name!r} is not available, choose from {BACKENDS}.")
+    BACKEND = name
+
+
+def set_precision(name="float64"):
+    """
+    Select the floating point precision of the kernels: "float32" or "float64".
+    """
+    global PRECISION
+    if name not in PRECISIONS:
+        raise ValueError(f"Precision {name!r} is not supported, choose from {tuple(PRECISIONS)}.")
+    PRECISION = name
+
+
+def bond_price(y, coupon, n_periods, face=100.0):
+    """
+    Compute bond prices from yields, assuming semi-annual compounding.
+
+    :param y: Array of yields to maturity (decimal)
+    :param coupon: Array of annual coupon payments per `face` (e.g. 1.5 for a 1.5% bond)
+    :param n_periods: Array of remaining semi-annual coupon periods
+    :param face: Face value
+    :return: Array of bond prices
+    """
+    dtype = PRECISIONS[PRECISION]
+    y, coupon, n_periods = np.broadcast_arrays(np.asarray(y, dtype=dtype),
+                                               np.asarray(coupon, dtype=dtype),
+                                               np.asarray(n_periods, dtype=dtype))
+    if BACKEND == "numba":
+        return _numba_bond_price(y.ravel(), coupon.ravel(), n_periods.ravel(),
+                                 dtype(face)).reshape(y.shape)
+    return _numpy_bond_price(y, coupon, n_periods, dtype(face))
+
+
+def bond_ytm(price, coupon, n_periods, face=100.0):
+    """
+    Find the yield to maturity of each bond by scanning a 1bp yield grid between 0% and 20% for
+    the price crossing and refining it with linear interpolation.
+
+    :param price: Array of bond prices
+    :param coupon: Array of annual coupon payments per `face`
+    :param n_periods: Array of remaining semi-annual coupon periods
+    :param face: Face value
+    :return: Array of YTMs, NaN where no YTM was found on the grid
+    """
+    dtype = PRECISIONS[PRECISION]
+    price, coupon, n_periods = np.broadcast_arrays(np.asarray(price, dtype=dtype),
+                                                   np.asarray(coupon, dtype=dtype),
+                                                   np.asarray(n_periods, dtype=dtype))
+    shape = price.shape
+    price, coupon, n_periods = price.ravel(), coupon.ravel(), n_periods.ravel()
+    if BACKEND == "numba":
+        return _numba_bond_ytm(price, coupon, n_periods, dtype(face)).reshape(shape)
+    return _numpy_bond_ytm(price, coupon, n_periods, dtype(face)).reshape(shape)
+
+
+def bootstrap_spot_rates(prices, coupons, time_periods, n_periods, compounding_frequency=2):
+    """
+    Bootstrap spot rates pillar by pillar for a batch of valuation dates. Bonds must be sorted by
+    maturity along the second axis, and the j-th cash flow of each bond is discounted with the
+    j-th spot rate, as in calc_spot.bootstrap_yield_curve.
+
+    :param prices: (dates, bonds) array of dirty prices
+    :param coupons: (dates, bonds) array of annual coupon rates (decimal)
+    :param time_periods: (dates, bonds, periods) array of cash flow times in years, padded with
+                         any value after the last cash flow of each bond
+    :param n_periods: (dates, bonds) array with the number of cash flows of each bond
+    :param compounding_frequency: Number of compounding periods per year (default = 2)
+    :return: (spot_rates, flags) arrays of shape (dates, bonds); flags hold BOOTSTRAP_* codes
+    """
+    dtype = PRECISIONS[PRECISION]
+    prices = np.ascontiguousarray(prices, dtype=dtype)
+    coupons = np.ascontiguousarray(coupons, dtype=dtype)
+    time_periods = np.ascontiguousarray(time_periods, dtype=dtype)
+    n_periods = np.ascontiguousarray(n_periods, dtype=np.int64)
+    if BACKEND == "numba":
+        return _numba_bootstrap(prices, coupons, time_periods, n_periods,
+                                dtype(compounding_frequency))
+    return _numpy_bootstrap(prices, coupons, time_periods, n_periods, compounding_frequency)
+
+
+def pad_time_periods(time_periods_list):
+    """
+    Stack a list of per-bond time period arrays into a padded (bonds, periods) array.
+
+    :return: (padded_time_periods, n_periods)
+    """
+    n_periods = np.array([len(periods) for periods in time_periods_list], dtype=np.int64)
+    padded = np.zeros((len(time_periods_list), max(n_periods.max(initial=1), 1)))
+    for i, periods in enumerate(time_periods_list):
+        padded[i, :len(periods)] = periods
+    return padded, n_periods
+
+
+set_backend(os.environ.get("APM466_BACKEND", "auto"))
+set_precision(os.environ.get("APM466_PRECISION", "float64"))
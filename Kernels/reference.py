@@ -0,0 +1,90 @@
+"""
+High-precision mpmath reference implementations of the kernels in kernels.py, used to measure the
+error of the float32 and float64 modes. They loop in Python over mpf numbers, so they are meant
+for samples of a few hundred bonds, not for production runs.
+"""
+import numpy as np
+from mpmath import mp, mpf
+
+# Decimal digits used by the reference computations
+REFERENCE_DPS = 50
+
+
+def reference_bond_price(y, coupon, n_periods, face=100):
+    """
+    Price one bond from its yield by summing the discounted cash flows, as calc_ytm.bond_price.
+    """
+    with mp.workdps(REFERENCE_DPS):
+        y, coupon, face = mpf(y), mpf(coupon), mpf(face)
+        n_periods = int(n_periods)
+        price = sum((coupon / 2) / (1 + y / 2) ** i for i in range(1, n_periods + 1))
+        price += face / (1 + y / 2) ** n_periods
+        return price
+
+
+def reference_bond_ytm(price, coupon, n_periods, face=100):
+    """
+    Solve the exact yield to maturity of one bond with a bracketing root finder, rather than the
+    1bp grid of kernels.bond_ytm.
+
+    :return: YTM as an mpf, or None if there is no root between -50% and 100%
+    """
+    with mp.workdps(REFERENCE_DPS):
+        price = mpf(price)
+
+        def pricing_error(y):
+            return reference_bond_price(y, coupon, n_periods, face) - price
+
+        low, high = mpf("-0.5"), mpf(1)
+        if pricing_error(low) * pricing_error(high) > 0:
+            return None
+
+        # Bisect down to a narrow bracket, then let the secant method converge to full precision
+        for _ in range(30):
+            middle = (low + high) / 2
+            if pricing_error(low) * pricing_error(middle) <= 0:
+                high = middle
+            else:
+                low = middle
+        return mp.findroot(pricing_error, (low, high), solver="secant")
+
+
+def reference_bootstrap(prices, coupons, time_periods, n_periods, compounding_frequency=2):
+    """
+    Bootstrap spot rates with the algorithm of kernels.bootstrap_spot_rates in mpf arithmetic.
+
+    Bonds with an invalid price get None, as do the later pillars whose earlier cash flows (or
+    low-residual fallback) depend on one, where the kernels carry NaN.
+
+    :return: (dates, bonds) object array of mpf spot rates (None where the kernels give NaN)
+    """
+    n_dates, n_bonds, max_periods = np.shape(time_periods)
+    spot_rates = np.empty((n_dates, n_bonds), dtype=object)
+
+    with mp.workdps(REFERENCE_DPS):
+        frequency = mpf(compounding_frequency)
+        for d in range(n_dates):
+            rates = [mpf(0)] * max(n_bonds, max_periods)
+            for i in range(n_bonds):
+                price = mpf(prices[d][i])
+                n = int(n_periods[d][i])
+                if price <= 0 or any(rate is None for rate in rates[:n - 1]):
+                    rates[i] = None
+                    continue
+
+                coupon_payment = mpf(coupons[d][i]) * 100
+                times = [mpf(time_periods[d][i][j]) for j in range(n)]
+                final_cash_flow = 100 + coupon_payment / 2
+
+                discounted_cash_flows = sum(
+                    (coupon_payment / 2) / (1 + rates[j] / frequency) ** (frequency * times[j])
+                    for j in range(n - 1))
+                residual = price - discounted_cash_flows
+                if n > 1 and residual <= 0:
+                    rates[i] = rates[i - 1] if i > 0 else mpf(0)
+                else:
+                    rates[i] = frequency * (
+                        (final_cash_flow / residual) ** (1 / (frequency * times[-1])) - 1)
+            spot_rates[d] = rates[:n_bonds]
+
+    return spot_rates
@@ -0,0 +1,127 @@
+"""
+Vectorized versions of generate_coupon_dates / generate_time_periods from calc_ytm.py and
+calc_spot.py, operating on whole arrays of (maturity date, valuation date) pairs, and the
+sparse cash flow matrix of a bond universe.
+"""
+import numpy as np
+from scipy import sparse
+
+
+def _days_in_month(months):
+    """
+    Number of days in each month, given months as datetime64[M] integers.
+    """
+    months = np.asarray(months, dtype="datetime64[M]")
+    return ((months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")).astype(int)
+
+
+def _step_back(maturity, k):
+    """
+    Date reached after moving back 6 months k times from maturity with relativedelta, which
+    clamps the day of month at every step (e.g. Aug 31 -> Feb 28 -> Aug 28).
+    """
+    month = maturity.astype("datetime64[M]")
+    day = (maturity - month.astype("datetime64[D]")).astype(int) + 1
+    target = month - 6 * k
+
+    # The visited months alternate between two calendar months, so the clamp only depends on
+    # the first two steps, plus February appearing in at least two different years
+    day = np.where(k >= 1, np.minimum(day, _days_in_month(month - 6)), day)
+    day = np.where(k >= 2, np.minimum(day, _days_in_month(month - 12)), day)
+    first_is_february = (month - 6).astype(int) % 12 == 1
+    second_is_february = month.astype(int) % 12 == 1
+    day = np.where((k >= 3) & first_is_february, np.minimum(day, 28), day)
+    day = np.where((k >= 4) & second_is_february, np.minimum(day, 28), day)
+    return target.astype("datetime64[D]") + (day - 1)
+
+
+def next_coupon_dates(maturity, current):
+    """
+    Nearest coupon date on or after each valuation date, stepping back 6 months from maturity.
+
+    :param maturity: Array of maturity dates (datetime64)
+    :param current: Array of valuation dates (datetime64)
+    :return: Array of next coupon dates (datetime64[D]); the maturity itself once it is reached
+    """
+    maturity, current = np.broadcast_arrays(np.asarray(maturity, dtype="datetime64[D]"),
+                                            np.asarray(current, dtype="datetime64[D]"))
+    month_gap = (maturity.astype("datetime64[M]") - current.astype("datetime64[M]")).astype(int)
+    k = np.maximum(month_gap // 6, 0)
+    candidate = _step_back(maturity, k)
+    # A candidate in the valuation month may fall on or before the valuation day
+    k = np.where((candidate <= current) & (k > 0), k - 1, k)
+    return np.where(maturity > current, _step_back(maturity, k), maturity)
+
+
+def coupon_periods(maturity, current):
+    """
+    Compute, for each bond, the time to the next coupon and the number of remaining coupon
+    periods, matching len(generate_time_periods(maturity_day, current_day)).
+
+    :param maturity: Array of maturity dates (datetime64)
+    :param current: Array of valuation dates (datetime64)
+    :return: (first_period, n_periods); n_periods is 0 for bonds that matured before `current`
+    """
+    maturity, current = np.broadcast_arrays(np.asarray(maturity, dtype="datetime64[D]"),
+                                            np.asarray(current, dtype="datetime64[D]"))
+    first_period = (next_coupon_dates(maturity, current) - current).astype(int) / 365
+    end_period = (maturity - current).astype(int) / 365
+
+    # Same count as np.arange(first_period, end_period + 0.1, 0.5)
+    n_periods = np.ceil((end_period + 0.1 - first_period) / 0.5).astype(np.int64)
+    n_periods = np.where(first_period != end_period, n_periods, 1)
+    n_periods = np.where(maturity < current, 0, n_periods)
+    return first_period, n_periods
+
+
+def time_period_matrix(first_period, n_periods, max_periods=None):
+    """
+    Expand (first_period, n_periods) into padded time periods, first_period + 0.5 * j.
+
+    :return: Array of shape first_period.shape + (max_periods,); entries past n_periods are 0
+    """
+    if max_periods is None:
+        max_periods = max(int(np.max(n_periods, initial=1)), 1)
+    steps = np.arange(max_periods)
+    time_periods = first_period[..., None] + 0.5 * steps
+    return np.where(steps < n_periods[..., None], time_periods, 0.0)
+
+
+def cash_flow_matrix(coupon_rates, maturity, start, face=100):
+    """
+    Build the sparse bonds x cash-flow-dates matrix of all payments after `start`, with coupon
+    dates generated as in generate_coupon_dates (every 6 months back from maturity).
+
+    :param coupon_rates: Array of annual coupon rates (decimal)
+    :param maturity: Array of maturity dates (datetime64)
+    :param start: Date after which cash flows are included (datetime64)
+    :param face: Face value
+    :return: (cash_flow_dates, matrix); cash_flow_dates is the sorted union of payment dates and
+             matrix is a scipy.sparse CSR matrix of shape (bonds, cash_flow_dates)
+    """
+    coupon_rates = np.asarray(coupon_rates, dtype=float)
+    maturity = np.asarray(maturity, dtype="datetime64[D]")
+    start = np.datetime64(start, "D")
+
+    bond_index, payment_dates, amounts = [], [], []
+    k = 0
+    live = maturity > start
+    while live.any():
+        dates = _step_back(maturity[live], np.full(live.sum(), k))
+        paid = dates > start
+        bonds = np.flatnonzero(live)[paid]
+        bond_index.append(bonds)
+        payment_dates.append(dates[paid])
+        amounts.append(coupon_rates[bonds] * face / 2 + (face if k == 0 else 0))
+        live[np.flatnonzero(live)[~paid]] = False
+        k += 1
+
+    bond_index = np.concatenate(bond_index) if bond_index else np.array([], dtype=int)
+    payment_dates = np.concatenate(payment_dates) if payment_dates else \
+        np.array([], dtype="datetime64[D]")
+    amounts = np.concatenate(amounts) if amounts else np.array([])
+
+    cash_flow_dates, date_index = np.unique(payment_dates, return_inverse=True)
+    matrix = sparse.csr_matrix((amounts, (bond_index, date_index)),
+                               shape=(len(coupon_rates), len(cash_flow_dates)))
+    return cash_flow_dates, matrix
@@ -64,3 +64,16 @@ print("Eigenvalues of Forward Rate Covariance Matrix:")
 print(eigvals_forward)
 print("\nEigenvectors of Forward Rate Covariance Matrix:")
 print(eigvecs_forward)
+
+# Save eigenvalues and eigenvectors (one row per eigenvalue, eigenvector components as columns).
+# The covariance matrices are symmetric, so eigh gives real results; order by largest eigenvalue.
+pca_results = []
+for matrix_name, cov in [("Yield", cov_ytm), ("Forward Rate", cov_fwd)]:
+    eigvals, eigvecs = np.linalg.eigh(cov)
+    order = np.argsort(eigvals)[::-1]
+    for k in order:
+        pca_results.append([matrix_name, eigvals[k]] + list(eigvecs[:, k]))
+pca_df = pd.DataFrame(pca_results, columns=["Matrix", "Eigenvalue"] +
+                      [f"Component {i + 1}" for i in range(len(cov_ytm))])
+pca_df.to_csv("pca_results.csv", index=False)
+print("PCA results saved to pca_results.csv")
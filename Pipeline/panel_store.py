@@ -0,0 +1,147 @@
+"""
+Columnar, memory-mapped storage for bond price panels in the bond_selection.csv format.
+
+A store is a directory holding one .npy file per column, with rows sorted by date:
+- date.npy, maturity.npy (int64 days since 1970-01-01)
+- bond_id.npy (int32, row of bonds.csv)
+- coupon.npy, close.npy, dirty.npy (float64)
+- dates.npy (datetime64[D], the unique valuation dates) and offsets.npy (int64), so the rows
+  of dates[i] are offsets[i]:offsets[i + 1]
+- bonds.csv (Name and ISIN of every bond_id)
+
+The store is built from a CSV in two streaming passes and read back with np.load(mmap_mode="r"),
+so neither building nor reading it needs the whole panel in memory.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+PANEL_COLUMNS = {
+    "date": np.int64,
+    "maturity": np.int64,
+    "bond_id": np.int32,
+    "coupon": np.float64,
+    "close": np.float64,
+    "dirty": np.float64,
+}
+
+
+def _read_chunks(csv_path, chunksize):
+    """
+    Stream the price panel CSV, parsing dates into int64 days.
+    """
+    usecols = ["Name", "ISIN", "Coupon Rate", "Maturity Date", "Date", "Close", "Dirty"]
+    for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=chunksize):
+        chunk["Maturity Date"] = pd.to_datetime(chunk["Maturity Date"], errors='coerce')
+        chunk["Date"] = pd.to_datetime(chunk["Date"], errors='coerce')
+        chunk = chunk[pd.notna(chunk["Maturity Date"]) & pd.notna(chunk["Date"])]
+        chunk["date"] = chunk["Date"].values.astype("datetime64[D]").astype(np.int64)
+        chunk["maturity"] = chunk["Maturity Date"].values.astype("datetime64[D]").astype(np.int64)
+        yield chunk
+
+
+def build_panel_store(csv_path, store_dir, chunksize=500_000):
+    """
+    Convert a price panel CSV into a date-sorted columnar store.
+
+    The first pass assigns bond ids and counts the rows of every date, the second pass writes
+    each chunk straight to its final position in the memory-mapped columns (a counting sort),
+    so memory use is bounded by `chunksize` rather than by the panel length.
+
+    :param csv_path: Path of a CSV in the bond_selection.csv format
+    :param store_dir: Output directory
+    :param chunksize: Number of CSV rows read at once
+    """
+    os.makedirs(store_dir, exist_ok=True)
+
+    # First pass: bond ids and row counts per date
+    bond_ids = {}
+    bond_names = []
+    date_counts = {}
+    for chunk in _read_chunks(csv_path, chunksize):
+        for name, isin in zip(chunk["Name"], chunk["ISIN"]):
+            if isin not in bond_ids:
+                bond_ids[isin] = len(bond_ids)
+                bond_names.append(name)
+        dates, counts = np.unique(chunk["date"].to_numpy(), return_counts=True)
+        for date, count in zip(dates, counts):
+            date_counts[date] = date_counts.get(date, 0) + count
+
+    unique_dates = np.array(sorted(date_counts), dtype=np.int64)
+    offsets = np.zeros(len(unique_dates) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([date_counts[date] for date in unique_dates])
+    n_rows = int(offsets[-1])
+
+    columns = {name: np.lib.format.open_memmap(os.path.join(store_dir, f"{name}.npy"), mode="w+",
+                                               dtype=dtype, shape=(n_rows,))
+               for name, dtype in PANEL_COLUMNS.items()}
+
+    # Second pass: scatter every chunk into the date-sorted columns
+    cursor = offsets[:-1].copy()
+    for chunk in _read_chunks(csv_path, chunksize):
+        date_index = np.searchsorted(unique_dates, chunk["date"].to_numpy())
+        order = np.argsort(date_index, kind="stable")
+        sorted_index = date_index[order]
+        group_start = np.searchsorted(sorted_index, sorted_index, side="left")
+        positions = np.empty(len(order), dtype=np.int64)
+        positions[order] = cursor[sorted_index] + np.arange(len(order)) - group_start
+        np.add.at(cursor, sorted_index, 1)
+
+        values = {
+            "date": chunk["date"].to_numpy(),
+            "maturity": chunk["maturity"].to_numpy(),
+            "bond_id": chunk["ISIN"].map(bond_ids).to_numpy(),
+            "coupon": chunk["Coupon Rate"].to_numpy(dtype=float),
+            "close": chunk["Close"].to_numpy(dtype=float),
+            "dirty": chunk["Dirty"].to_numpy(dtype=float),
+        }
+        for name, column in columns.items():
+            column[positions] = values[name]
+
+    for column in columns.values():
+        column.flush()
+    np.save(os.path.join(store_dir, "dates.npy"), unique_dates.astype("datetime64[D]"))
+    np.save(os.path.join(store_dir, "offsets.npy"), offsets)
+    pd.DataFrame({"Name": bond_names, "ISIN": list(bond_ids)}).to_csv(
+        os.path.join(store_dir, "bonds.csv"), index_label="bond_id")
+
+
+def open_panel_store(store_dir):
+    """
+    Open a store built by build_panel_store with read-only memory-mapped columns.
+
+    :return: dict with one memory-mapped array per column, plus "dates", "offsets" and "bonds"
+    """
+    store = {name: np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode="r")
+             for name in PANEL_COLUMNS}
+    store["dates"] = np.load(os.path.join(store_dir, "dates.npy"))
+    store["offsets"] = np.load(os.path.join(store_dir, "offsets.npy"))
+    store["bonds"] = pd.read_csv(os.path.join(store_dir, "bonds.csv"), index_col="bond_id")
+    return store
+
+
+def iter_date_chunks(offsets, max_rows):
+    """
+    Split the dates of a store into consecutive ranges holding at most `max_rows` rows. A single
+    date with more rows than `max_rows` still forms its own range.
+
+    :return: Generator of (first_date_index, stop_date_index)
+    """
+    start = 0
+    n_dates = len(offsets) - 1
+    while start < n_dates:
+        stop = int(np.searchsorted(offsets, offsets[start] + max_rows, side="right")) - 1
+        stop = min(max(stop, start + 1), n_dates)
+        yield start, stop
+        start = stop
+
+
+if __name__ == "__main__":
+    # Input and output paths
+    csv_path = "../Data Extract/bond_selection.csv"
+    store_dir = "panel_store"
+
+    build_panel_store(csv_path, store_dir)
+    store = open_panel_store(store_dir)
+    print(f"Stored {len(store['date'])} rows over {len(store['dates'])} dates in {store_dir}")
@@ -0,0 +1,222 @@
+"""
+Out-of-core execution of the YTM, spot, forward and carry stages.
+
+The panel is read from a columnar store (see panel_store.py) in date-aligned chunks sized from a
+memory budget. Each chunk runs the four stages with the array kernels and appends its rows to
+ytm.csv, bootstrapped_spot_rates.csv, forward_curve.csv and carry_rolldown.csv, so peak memory
+depends on the budget and the widest date, not on the length of the history. Output rows are
+ordered by date, then maturity.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import panel_store
+
+sys.path.append("../Kernels")
+import carry
+import curves
+import kernels
+import schedule
+
+# Rough bytes held per panel row while a chunk is processed: the copied input columns, the
+# schedule and result arrays, the padded carry inputs and the carry output rows (one per horizon
+# and assumption, held twice while they are concatenated), plus the padded (dates, bonds, periods)
+# bootstrap inputs and carry cash flows
+_BYTES_PER_ROW = 8 * 32 + \
+    2 * 8 * len(carry.CARRY_COLUMNS) * len(carry.HORIZONS) * len(carry.ASSUMPTIONS)
+_BYTES_PER_ROW_PERIOD = 8 * 5
+
+# Peak bytes held by carry.carry_rolldown per (date, bond, horizon, period) cell of its grid. The
+# carry stage runs on blocks of dates sized to fit in its own share of the memory budget, and
+# chunks are sized from the rest
+CARRY_BYTES_PER_CELL = 8 * 18
+CARRY_BUDGET_SHARE = 0.25
+
+# Scratch space of the NumPy YTM kernel, which prices a block of bonds on the whole yield grid
+KERNEL_WORKSPACE_BYTES = 4 * 8 * kernels.YTM_GRID_POINTS * kernels.NUMPY_YTM_CHUNK
+
+FORWARD_TENORS = [2, 3, 4, 5]
+
+# Column layouts of ytm.csv, bootstrapped_spot_rates.csv and forward_curve.csv (carry_rolldown.csv
+# uses carry.CARRY_COLUMNS)
+YTM_COLUMNS = ["Bond Name", "ISIN", "Date", "Maturity Date", "YTM"]
+SPOT_RATE_COLUMNS = ["Bond Name", "Coupon Rate", "Date", "Maturity Date", "Close", "Spot Rate"]
+FORWARD_COLUMNS = ["Date"] + [f"1Y-{n}Y Forward Rate" for n in FORWARD_TENORS]
+
+
+def rows_per_chunk(store, memory_budget_mb):
+    """
+    Number of panel rows that fit in the memory budget, net of the carry stage's share.
+    """
+    max_years = (store["maturity"].max() - store["date"].min()) / 365
+    max_periods = int(np.ceil(2 * max_years)) + 1
+    bytes_per_row = _BYTES_PER_ROW + _BYTES_PER_ROW_PERIOD * max_periods
+    available = (1 - CARRY_BUDGET_SHARE) * memory_budget_mb * 2 ** 20 - KERNEL_WORKSPACE_BYTES
+    if available <= 0:
+        raise ValueError(f"Memory budget of {memory_budget_mb}MB does not cover the kernel "
+                         f"workspace of {KERNEL_WORKSPACE_BYTES / 2 ** 20:.0f}MB once "
+                         f"{CARRY_BUDGET_SHARE:.0%} is set aside for the carry stage.")
+    return max(int(available // bytes_per_row), 1)
+
+
+def compute_forward_rates(spot_rates):
+    """
+    Compute 1-year forward rates for a batch of dates, as calc_foward_rate.compute_forward_rates
+    does for one date.
+
+    :param spot_rates: (dates, bonds) array of spot rates sorted by maturity; padded with NaN
+    :return: (dates, len(FORWARD_TENORS)) array of 1Y-nY forward rates
+    """
+    semi_annual_rates = (spot_rates[:, :-1] + spot_rates[:, 1:]) / 2
+    forward_rates = np.full((len(spot_rates), len(FORWARD_TENORS)), np.nan)
+    if semi_annual_rates.shape[1] < max(FORWARD_TENORS):
+        return forward_rates
+    for k, n in enumerate(FORWARD_TENORS):
+        forward_rates[:, k] = (((1 + semi_annual_rates[:, n - 1]) ** (2 * n)) /
+                               ((1 + semi_annual_rates[:, 0]) ** (2 * 1))) ** (1 / (2 * (n - 1))) - 1
+    return forward_rates
+
+
+def process_chunk(store, rows, carry_budget_bytes=None):
+    """
+    Run the YTM, spot, forward and carry stages on one date-aligned slice of the store.
+
+    :param carry_budget_bytes: Memory available to the carry stage, which then runs on as many
+                               dates at a time as fit (at least one); None runs all dates at once
+    :return: (ytm_df, spot_rate_df, forward_rates_df, carry_df)
+    """
+    date = np.array(store["date"][rows])
+    maturity = np.array(store["maturity"][rows])
+    bond_id = np.array(store["bond_id"][rows])
+    coupon = np.array(store["coupon"][rows])
+    close = np.array(store["close"][rows])
+    dirty = np.array(store["dirty"][rows])
+
+    # Drop matured bonds and sort by date, then maturity, as the bootstrap expects
+    order = np.lexsort((maturity, date))
+    order = order[maturity[order] > date[order]]
+    date, maturity, bond_id = date[order], maturity[order], bond_id[order]
+    coupon, close, dirty = coupon[order], close[order], dirty[order]
+
+    first_period, n_periods = schedule.coupon_periods(maturity.astype("datetime64[D]"),
+                                                      date.astype("datetime64[D]"))
+
+    # YTM stage (coupon rate converted into coupon payment)
+    ytms = kernels.bond_ytm(close, coupon * 100, n_periods)
+
+    # Spot stage: pad every date to the widest bond ladder in the chunk
+    if len(date) == 0:
+        return (pd.DataFrame(columns=YTM_COLUMNS), pd.DataFrame(columns=SPOT_RATE_COLUMNS),
+                pd.DataFrame(columns=FORWARD_COLUMNS), pd.DataFrame(columns=carry.CARRY_COLUMNS))
+    unique_dates, date_index, bond_counts = np.unique(date, return_inverse=True,
+                                                      return_counts=True)
+    position = np.arange(len(date)) - np.searchsorted(date_index, date_index, side="left")
+    shape = (len(unique_dates), bond_counts.max())
+    padded_prices = np.full(shape, np.nan)
+    padded_coupons = np.zeros(shape)
+    padded_first_period = np.ones(shape)
+    padded_n_periods = np.ones(shape, dtype=np.int64)
+    padded_prices[date_index, position] = dirty
+    padded_coupons[date_index, position] = coupon
+    padded_first_period[date_index, position] = first_period
+    padded_n_periods[date_index, position] = np.maximum(n_periods, 1)
+    time_periods = schedule.time_period_matrix(padded_first_period, padded_n_periods)
+    spot_rates, _ = kernels.bootstrap_spot_rates(padded_prices, padded_coupons, time_periods,
+                                                 padded_n_periods)
+
+    # Forward stage
+    forward_rates = compute_forward_rates(spot_rates)
+
+    names = store["bonds"]["Name"].to_numpy()[bond_id]
+    isins = store["bonds"]["ISIN"].to_numpy()[bond_id]
+    dates = date.astype("datetime64[D]")
+    maturities = maturity.astype("datetime64[D]")
+
+    # Carry stage on the padded (dates, bonds) grid, using the chunk's spot curves as pillars
+    present = np.zeros(shape, dtype=bool)
+    present[date_index, position] = True
+    pillar_years = np.full(shape, np.nan)
+    pillar_years[date_index, position] = (maturities - dates).astype(int) / 365
+    pillar_values = np.where(present, spot_rates, np.nan)
+    cash_flows = curves.coupon_cash_flows(padded_coupons, np.where(present, padded_n_periods, 0),
+                                          time_periods.shape[-1])
+    padded_names, padded_isins = np.empty(shape, dtype=object), np.empty(shape, dtype=object)
+    padded_names[date_index, position] = names
+    padded_isins[date_index, position] = isins
+    padded_maturities = np.full(shape, np.datetime64("NaT"), dtype="datetime64[D]")
+    padded_maturities[date_index, position] = maturities
+    padded_dates = np.broadcast_to(unique_dates.astype("datetime64[D]")[:, None], shape)
+
+    # The carry grid is (dates, widest date's bonds, horizons, periods), whatever the row count
+    bytes_per_date = CARRY_BYTES_PER_CELL * shape[1] * len(carry.HORIZONS) * cash_flows.shape[-1]
+    dates_per_block = shape[0] if carry_budget_bytes is None else \
+        max(int(carry_budget_bytes // bytes_per_date), 1)
+    carry_tables = []
+    for block_start in range(0, shape[0], dates_per_block):
+        block = slice(block_start, block_start + dates_per_block)
+        results = {assumption: carry.carry_rolldown(cash_flows[block], time_periods[block],
+                                                    pillar_years[block], pillar_values[block],
+                                                    assumption=assumption)
+                   for assumption in carry.ASSUMPTIONS}
+        carry_tables.append(carry.carry_table(results, padded_names[block], padded_isins[block],
+                                              padded_dates[block], padded_maturities[block]))
+    carry_df = pd.concat(carry_tables, ignore_index=True)
+    ytm_df = pd.DataFrame(dict(zip(YTM_COLUMNS, [names, isins, dates, maturities, ytms])))
+    spot_rate_df = pd.DataFrame(dict(zip(SPOT_RATE_COLUMNS, [
+        names, coupon, dates, maturities, close, spot_rates[date_index, position]])))
+    forward_rates_df = pd.DataFrame(forward_rates, columns=FORWARD_COLUMNS[1:])
+    forward_rates_df.insert(0, "Date", unique_dates.astype("datetime64[D]"))
+    return ytm_df, spot_rate_df, forward_rates_df, carry_df
+
+
+def run_chunked(store_dir, output_dir, memory_budget_mb=256):
+    """
+    Run the pipeline over a panel store chunk by chunk, appending results to the output CSVs.
+
+    :param store_dir: Directory written by panel_store.build_panel_store
+    :param output_dir: Directory for ytm.csv, bootstrapped_spot_rates.csv, forward_curve.csv and
+                       carry_rolldown.csv
+    :param memory_budget_mb: Target peak memory for one chunk, in MB
+    """
+    store = panel_store.open_panel_store(store_dir)
+    max_rows = rows_per_chunk(store, memory_budget_mb)
+    carry_budget_bytes = CARRY_BUDGET_SHARE * memory_budget_mb * 2 ** 20
+    os.makedirs(output_dir, exist_ok=True)
+
+    output_files = [os.path.join(output_dir, file_name) for file_name in
+                    ["ytm.csv", "bootstrapped_spot_rates.csv", "forward_curve.csv",
+                     "carry_rolldown.csv"]]
+    for file_path in output_files:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    for start, stop in panel_store.iter_date_chunks(store["offsets"], max_rows):
+        rows = slice(store["offsets"][start], store["offsets"][stop])
+        if rows.stop - rows.start > max_rows:
+            print(f"Warning: {store['dates'][start]} alone has {rows.stop - rows.start} rows, "
+                  f"more than the {max_rows} rows allowed by the memory budget.")
+
+        for file_path, result_df in zip(output_files,
+                                        process_chunk(store, rows, carry_budget_bytes)):
+            result_df.to_csv(file_path, mode="a", header=not os.path.exists(file_path),
+                             index=False)
+        print(f"Processed {store['dates'][start]} to {store['dates'][stop - 1]}")
+
+
+if __name__ == "__main__":
+    # Input and output paths
+    store_dir = "panel_store"  # Built by panel_store.py
+    output_dir = "chunked_output"
+    memory_budget_mb = 256
+
+    run_chunked(store_dir, output_dir, memory_budget_mb)
+
+    try:
+        import resource
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"Peak RSS: {peak_mb:.0f}MB")
+    except ImportError:  # resource is not available on Windows
+        pass
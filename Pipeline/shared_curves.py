@@ -0,0 +1,242 @@
+"""
+Publish the bond panel and curve arrays once, for any number of worker processes to attach to as
+read-only NumPy views without pickling or copying.
+
+The arrays live in one block, either a multiprocessing.shared_memory segment or a file opened with
+np.memmap, with the following little-endian layout:
+
+    offset 0    header, 32 bytes: struct "<8sIIQQ"
+                - magic b"APM466SC"
+                - layout version (1)
+                - number of arrays
+                - total block size in bytes
+                - reserved (0)
+    offset 32   one 80-byte entry per array: struct "<32s8sII3QQ"
+                - name, ASCII, null padded
+                - dtype string (np.dtype.str, e.g. b"<f8", b"<M8[D]", b"|S12")
+                - number of dimensions (at most 3)
+                - reserved (0)
+                - shape, padded with 0
+                - offset of the array data from the start of the block
+    data        C-contiguous array data, each array starting on a 64-byte boundary
+
+build_curve_arrays gives the standard contents: the valuation dates, the bond static data, and
+(dates, bonds) panels of close and dirty prices, YTMs and spot rates, plus the forward curve.
+"""
+import struct
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"APM466SC"
+LAYOUT_VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")
+ENTRY = struct.Struct("<32s8sII3QQ")
+ALIGNMENT = 64
+MAX_DIMS = 3
+NAME_BYTES = 32
+DTYPE_BYTES = 8
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _check_arrays(arrays):
+    """
+    Raise ValueError unless every name and array fits in its entry of the array table, and names
+    stay distinct once read back.
+    """
+    names = set()
+    for name, array in arrays.items():
+        encoded = name.encode("ascii")
+        if len(encoded) > NAME_BYTES:
+            raise ValueError(f"Array name {name!r} is longer than {NAME_BYTES} bytes.")
+        # read_layout strips the null padding, so trailing nulls do not make a name distinct
+        if encoded.rstrip(b"\0") in names:
+            raise ValueError(f"Array name {name!r} is used more than once.")
+        names.add(encoded.rstrip(b"\0"))
+
+        array = np.asarray(array)
+        if array.ndim > MAX_DIMS or array.dtype.hasobject:
+            raise ValueError(f"Array {name!r} cannot be shared: use at most {MAX_DIMS} dimensions "
+                             f"and a fixed-size dtype.")
+        if len(array.dtype.str) > DTYPE_BYTES:
+            raise ValueError(f"Array {name!r} cannot be shared: its dtype string "
+                             f"{array.dtype.str!r} is longer than {DTYPE_BYTES} bytes.")
+
+
+def layout_size(arrays):
+    """
+    Number of bytes needed to hold `arrays` (a dict of name -> np.ndarray) in the block layout.
+    Raises ValueError if the arrays cannot be stored in it.
+    """
+    _check_arrays(arrays)
+    offset = _aligned(HEADER.size + ENTRY.size * len(arrays))
+    for array in arrays.values():
+        offset = _aligned(offset + np.asarray(array).nbytes)
+    return offset
+
+
+def write_layout(buffer, arrays):
+    """
+    Write the header, array table and array data into a writable buffer of layout_size(arrays)
+    bytes.
+    """
+    size = layout_size(arrays)
+    HEADER.pack_into(buffer, 0, MAGIC, LAYOUT_VERSION, len(arrays), size, 0)
+    offset = _aligned(HEADER.size + ENTRY.size * len(arrays))
+    for k, (name, array) in enumerate(arrays.items()):
+        # Unlike np.ascontiguousarray, keeps 0-d arrays 0-d
+        array = np.asarray(array, order="C")
+        shape = list(array.shape) + [0] * (MAX_DIMS - array.ndim)
+        ENTRY.pack_into(buffer, HEADER.size + ENTRY.size * k, name.encode("ascii"),
+                        array.dtype.str.encode("ascii"), array.ndim, 0, *shape, offset)
+        np.frombuffer(buffer, dtype=array.dtype, count=array.size, offset=offset)[:] = \
+            array.ravel()
+        offset = _aligned(offset + array.nbytes)
+
+
+def read_layout(buffer):
+    """
+    Create read-only NumPy views of all arrays stored in a buffer.
+
+    :return: dict of name -> np.ndarray viewing the buffer
+    """
+    magic, version, n_arrays, _, _ = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != LAYOUT_VERSION:
+        raise ValueError(f"Not a version {LAYOUT_VERSION} curve block.")
+
+    arrays = {}
+    for k in range(n_arrays):
+        name, dtype, ndim, _, *shape, offset = ENTRY.unpack_from(buffer, HEADER.size + ENTRY.size * k)
+        shape = tuple(shape[:ndim])
+        dtype = np.dtype(dtype.rstrip(b"\0").decode("ascii"))
+        array = np.frombuffer(buffer, dtype=dtype, count=int(np.prod(shape)), offset=offset)
+        array = array.reshape(shape)
+        array.flags.writeable = False
+        arrays[name.rstrip(b"\0").decode("ascii")] = array
+    return arrays
+
+
+def publish_shared(arrays, name=None):
+    """
+    Copy arrays into a new shared memory segment. The caller owns the segment and must call
+    close() and unlink() on it once all workers are done.
+
+    :return: The SharedMemory object; workers attach with attach_shared(shm.name)
+    """
+    shm = shared_memory.SharedMemory(name=name, create=True, size=layout_size(arrays))
+    write_layout(shm.buf, arrays)
+    return shm
+
+
+def attach_shared(name):
+    """
+    Attach to a segment created by publish_shared, without taking ownership of it.
+
+    :return: (shm, arrays); keep shm referenced for as long as the arrays are used
+    """
+    try:
+        # Python 3.13+: do not let this process's resource tracker unlink the segment on exit
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Older versions register the segment again, which is harmless for workers started by
+        # the publishing process since they share its resource tracker
+        shm = shared_memory.SharedMemory(name=name)
+    return shm, read_layout(shm.buf)
+
+
+def publish_file(arrays, path):
+    """
+    Write arrays to a file in the block layout, for workers to open with open_file.
+    """
+    block = np.memmap(path, dtype=np.uint8, mode="w+", shape=(layout_size(arrays),))
+    write_layout(block, arrays)
+    block.flush()
+
+
+def open_file(path):
+    """
+    Memory-map a file written by publish_file.
+
+    :return: dict of name -> read-only np.ndarray
+    """
+    return read_layout(np.memmap(path, dtype=np.uint8, mode="r"))
+
+
+def build_curve_arrays(bond_data_path, ytm_path, spot_path, forward_path):
+    """
+    Load the bond panel and the pipeline outputs into dense arrays, with bonds sorted by maturity
+    and missing observations set to NaN.
+
+    :return: dict of name -> np.ndarray suitable for publish_shared / publish_file
+    """
+    bond_df = pd.read_csv(bond_data_path)
+    bond_df["Maturity Date"] = pd.to_datetime(bond_df["Maturity Date"], errors='coerce')
+    bond_df["Date"] = pd.to_datetime(bond_df["Date"], errors='coerce')
+    universe = bond_df.drop_duplicates(subset="ISIN").sort_values(by=["Maturity Date"])
+    isins = universe["ISIN"].to_numpy()
+    dates = pd.DatetimeIndex(sorted(bond_df["Date"].dropna().unique()))
+
+    def panel(df, values):
+        return df.pivot_table(index="Date", columns="ISIN", values=values).reindex(
+            index=dates, columns=isins).to_numpy(dtype=float)
+
+    ytm_df = pd.read_csv(ytm_path, parse_dates=["Date"])
+
+    # The spot curve file has no ISIN column, so map bonds back by name, coupon and maturity
+    spot_df = pd.read_csv(spot_path, parse_dates=["Date", "Maturity Date"])
+    spot_df = spot_df.merge(universe[["Name", "Coupon Rate", "Maturity Date", "ISIN"]].rename(
+        columns={"Name": "Bond Name"}), on=["Bond Name", "Coupon Rate", "Maturity Date"])
+
+    forward_df = pd.read_csv(forward_path, parse_dates=["Date"]).set_index("Date").reindex(dates)
+
+    return {
+        "dates": dates.values.astype("datetime64[D]"),
+        "isin": isins.astype("S12"),
+        "coupon_rate": universe["Coupon Rate"].to_numpy(dtype=float),
+        "maturity": universe["Maturity Date"].values.astype("datetime64[D]"),
+        "close": panel(bond_df, "Close"),
+        "dirty": panel(bond_df, "Dirty"),
+        "ytm": panel(ytm_df, "YTM"),
+        "spot_rate": panel(spot_df, "Spot Rate"),
+        "forward_rate": forward_df.to_numpy(dtype=float),
+    }
+
+
+_worker_state = {}
+
+
+def _init_worker(shm_name):
+    _worker_state["shm"], _worker_state["arrays"] = attach_shared(shm_name)
+
+
+def _shifted_spot_value(shift):
+    """
+    Example worker task: total value of the universe discounted at maturity with spot rates
+    shifted by `shift`, for every date.
+    """
+    arrays = _worker_state["arrays"]
+    years = (arrays["maturity"][None, :] - arrays["dates"][:, None]).astype(int) / 365
+    cash_flow = 100 * (1 + arrays["coupon_rate"] / 2)
+    return np.nansum(cash_flow / (1 + (arrays["spot_rate"] + shift) / 2) ** (2 * years), axis=1)
+
+
+if __name__ == "__main__":
+    curve_arrays = build_curve_arrays("../Data Extract/bond_selection.csv", "../YTM Curve/ytm.csv",
+                                      "../Spot Curve/bootstrapped_spot_rates.csv",
+                                      "../Forward Rate Curve/forward_curve.csv")
+    shm = publish_shared(curve_arrays)
+    print(f"Published {layout_size(curve_arrays)} bytes as {shm.name}")
+
+    try:
+        shifts = np.linspace(-0.01, 0.01, 21)
+        with Pool(initializer=_init_worker, initargs=(shm.name,)) as pool:
+            values = pool.map(_shifted_spot_value, shifts)
+        for shift, value in zip(shifts, values):
+            print(f"Shift {shift * 10000:+.0f}bp: {value[0]:.4f}")
+    finally:
+        shm.close()
+        shm.unlink()
@@ -1,8 +1,13 @@
 
+import sys
+
 import numpy as np
 import pandas as pd
 from dateutil.relativedelta import relativedelta
 
+sys.path.append("../Kernels")
+import kernels
+
 
 def generate_coupon_dates(maturity_day, current_day):
     """
@@ -68,49 +73,26 @@ def bootstrap_yield_curve(bonds, compounding_frequency=2):
     :param compounding_frequency: Number of compounding periods per year (default = 2 for semiannual)
     :return: Array of spot rates for each bond
     """
-    spot_rates = np.zeros(len(bonds))
+    sorted_bonds = sorted(bonds, key=lambda x: x[2])
+
+    # Compute correct time periods for discounting
+    time_periods, n_periods = kernels.pad_time_periods(
+        [generate_time_periods(maturity_date, current_date)
+         for _, _, maturity_date, current_date in sorted_bonds])
+    # note time period already equivalent to the t_i in the semi-annual compounding
 
-    for i, (price, coupon_rate, maturity_date, current_date) in enumerate(sorted(bonds, key=lambda x: x[2])):
-        if price <= 0:
+    prices = np.array([[price for price, _, _, _ in sorted_bonds]])
+    coupon_rates = np.array([[coupon_rate for _, coupon_rate, _, _ in sorted_bonds]])
+    spot_rates, flags = kernels.bootstrap_spot_rates(prices, coupon_rates, time_periods[None],
+                                                     n_periods[None], compounding_frequency)
+
+    for (price, _, maturity_date, _), flag in zip(sorted_bonds, flags[0]):
+        if flag == kernels.BOOTSTRAP_INVALID_PRICE:
             print(f"Warning: Invalid bond price {price}. Skipping bond with maturity {maturity_date}.")
-            spot_rates[i] = np.nan  # Assign NaN to invalid calculations
-            continue
-
-        # Compute correct time periods for discounting
-        time_periods = generate_time_periods(maturity_date, current_date)
-        # note time period already equivalent to the t_i in the semi-annual compounding
-
-        # Construct cash flows using semiannual payments
-        coupon_payment = coupon_rate * 100  # Coupon payment per year
-        cash_flows = np.array([coupon_payment / 2] * (len(time_periods) - 1) +
-                              [100 + coupon_payment / 2])
-        # i.e. cash_flow is a list of the cash flow of one bond
-        # print(cash_flows)
-
-        # First bond (Zero-Coupon Bond first)
-        if len(cash_flows) == 1:
-            spot_rates[i] = compounding_frequency * (((100 + coupon_payment/2)
-                                                      / price) ** (1 / (2 * time_periods[-1])) - 1)
-        else:
-            # Compute present value of earlier cash flows using previously bootstrapped spot rates
-            discounted_cash_flows = sum(
-                cash_flows[j] / ((1 + spot_rates[j] / compounding_frequency) **
-                                 (2 * time_periods[j])) for j in range(len(cash_flows) - 1))
-            # Discount all earlier cash flows
-
-
-            # Compute the residual amount for the last cash flow
-            residual = price - discounted_cash_flows
-            if residual <= 0:
-                print(f"Warning: Residual for bond with maturity {maturity_date} is too low. Adjusting spot rate calculation.")
-                spot_rate = spot_rates[i-1]  # Use previous spot rate as an approximation
-            else:
-                # Solve for the new spot rate using the final cash flow
-                spot_rate = compounding_frequency * (((100 + coupon_payment/2) / residual) ** (1 / (2 * time_periods[-1])) - 1)
-
-            spot_rates[i] = spot_rate
-
-    return spot_rates
+        elif flag == kernels.BOOTSTRAP_LOW_RESIDUAL:
+            print(f"Warning: Residual for bond with maturity {maturity_date} is too low. Adjusting spot rate calculation.")
+
+    return spot_rates[0]
 
 # Load bond dataset
 bond_data_path = "../Data Extract/bond_selection.csv"
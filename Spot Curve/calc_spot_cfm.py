@@ -0,0 +1,167 @@
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.linalg import cho_factor, cho_solve
+
+sys.path.append("../Kernels")
+import schedule
+
+
+def monthly_knots(start, end):
+    """
+    Knot dates on the first day of every month covering [start, end].
+    """
+    first = np.datetime64(start, "M")
+    last = np.datetime64(end, "M") + 1
+    return np.arange(first, last + 1).astype("datetime64[D]")
+
+
+def interpolation_matrix(knot_dates, dates):
+    """
+    Sparse matrix mapping values on knot dates to values on arbitrary dates by linear
+    interpolation in time, so that d(dates) = interpolation_matrix @ d(knot_dates).
+
+    :return: scipy.sparse matrix of shape (len(dates), len(knot_dates))
+    """
+    knot_days = knot_dates.astype(int)
+    days = np.clip(np.asarray(dates, dtype="datetime64[D]").astype(int), knot_days[0],
+                   knot_days[-1])
+    right = np.clip(np.searchsorted(knot_days, days, side="right"), 1, len(knot_days) - 1)
+    left = right - 1
+    weight = (days - knot_days[left]) / (knot_days[right] - knot_days[left])
+    rows = np.repeat(np.arange(len(days)), 2)
+    cols = np.column_stack([left, right]).ravel()
+    values = np.column_stack([1 - weight, weight]).ravel()
+    return sparse.csr_matrix((values, (rows, cols)), shape=(len(days), len(knot_days)))
+
+
+def smoothness_penalty(knot_dates):
+    """
+    Build the second-difference operator of a discount function sampled on unevenly spaced
+    knot dates, i.e. the discrete second derivative with respect to time in years.
+
+    :return: scipy.sparse matrix of shape (len(knot_dates) - 2, len(knot_dates))
+    """
+    n = len(knot_dates)
+    if n < 3:
+        return sparse.csr_matrix((0, n))
+    h = np.diff(knot_dates).astype(int) / 365  # Spacing between knots in years
+    scale = 2 / (h[:-1] + h[1:])
+    rows = np.repeat(np.arange(n - 2), 3)
+    cols = (np.arange(n - 2)[:, None] + np.arange(3)).ravel()
+    values = np.column_stack([scale / h[:-1], -scale * (1 / h[:-1] + 1 / h[1:]),
+                              scale / h[1:]]).ravel()
+    return sparse.csr_matrix((values, (rows, cols)), shape=(n - 2, n))
+
+
+def fit_discount_factors(matrix, cash_flow_dates, maturities, valuation_dates, prices,
+                         knot_dates=None, smoothing=1e-2, prior_rate=0.03, ridge=1e-4):
+    """
+    Fit the discount function on a set of knot dates for every valuation date by penalised least
+    squares, in the spirit of Fisher-Nychka-Zervos smoothing splines:
+
+        min_d |C L d - p|^2 + smoothing * |D2 (d - d0)|^2 + ridge * |d - d0|^2
+
+    where C is the cash flow matrix restricted to the bonds priced on that date and the cash flows
+    still ahead, L interpolates the knots linearly onto the cash flow dates, D2 is the second-
+    difference operator and d0 the discount factors of a flat prior_rate curve (semi-annual
+    compounding), which anchors the curve where few bonds pay. The normal matrix only depends on
+    which cash flows are still ahead and which bonds are priced, so valuation dates sharing both
+    are solved together with a single Cholesky factorisation.
+
+    :param matrix: Sparse (bonds, cash_flow_dates) matrix from schedule.cash_flow_matrix
+    :param cash_flow_dates: Sorted array of cash flow dates (datetime64[D])
+    :param maturities: Array of bond maturity dates (datetime64[D])
+    :param valuation_dates: Array of valuation dates (datetime64[D])
+    :param prices: (valuation_dates, bonds) array of dirty prices, NaN where a bond is not priced
+    :param knot_dates: Knot dates of the discount function (default: first of every month)
+    :param smoothing: Weight of the smoothness penalty
+    :param prior_rate: Rate of the flat prior curve
+    :param ridge: Weight of the pull towards the prior curve
+    :return: (knot_dates, discount) where discount is a (valuation_dates, knot_dates) array
+    """
+    matrix = sparse.csr_matrix(matrix)
+    valuation_dates = np.asarray(valuation_dates, dtype="datetime64[D]")
+    if knot_dates is None:
+        knot_dates = monthly_knots(valuation_dates.min(), cash_flow_dates.max())
+    interpolation = interpolation_matrix(knot_dates, cash_flow_dates)
+    penalty = smoothness_penalty(knot_dates)
+    regulariser = (smoothing * (penalty.T @ penalty) +
+                   ridge * sparse.identity(len(knot_dates))).toarray()
+    discount = np.full((len(valuation_dates), len(knot_dates)), np.nan)
+
+    # Group valuation dates by (first cash flow date ahead, bonds priced)
+    first_live = np.searchsorted(cash_flow_dates, valuation_dates, side="right")
+    priced = np.isfinite(prices) & (maturities[None, :] > valuation_dates[:, None])
+    groups = {}
+    for d in range(len(valuation_dates)):
+        groups.setdefault((first_live[d], priced[d].tobytes()), []).append(d)
+
+    for (first, _), dates in groups.items():
+        bonds = np.flatnonzero(priced[dates[0]])
+        if len(bonds) == 0:
+            continue
+
+        cash_flows = (matrix[bonds][:, first:] @ interpolation[first:]).toarray()
+        factorisation = cho_factor(cash_flows.T @ cash_flows + regulariser)
+
+        # Right-hand sides for all valuation dates in the group at once
+        years = (knot_dates[:, None] - valuation_dates[None, dates]).astype(int) / 365
+        prior = (1 + prior_rate / 2) ** (-2 * years)
+        rhs = cash_flows.T @ prices[np.ix_(dates, bonds)].T + regulariser @ prior
+        discount[dates] = cho_solve(factorisation, rhs).T
+
+    return knot_dates, discount
+
+
+def spot_rates_at_maturity(knot_dates, discount, maturities, valuation_dates,
+                           compounding_frequency=2):
+    """
+    Convert the fitted discount function at each bond's maturity into spot rates.
+
+    :return: (valuation_dates, bonds) array of spot rates, NaN for matured bonds
+    """
+    maturity_discount = discount @ interpolation_matrix(knot_dates, maturities).T.toarray()
+    years = (maturities[None, :] - valuation_dates[:, None]).astype(int) / 365
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spot_rates = compounding_frequency * (
+            (1 / maturity_discount) ** (1 / (compounding_frequency * years)) - 1)
+    return np.where((years > 0) & (maturity_discount > 0), spot_rates, np.nan)
+
+
+if __name__ == "__main__":
+    # Load bond dataset
+    bond_data_path = "../Data Extract/bond_selection.csv"
+    bond_df = pd.read_csv(bond_data_path)
+
+    # Convert date columns to datetime format
+    bond_df["Maturity Date"] = pd.to_datetime(bond_df["Maturity Date"], errors='coerce')
+    bond_df["Date"] = pd.to_datetime(bond_df["Date"], errors='coerce')
+    bond_df = bond_df[pd.notna(bond_df["Maturity Date"]) & pd.notna(bond_df["Date"])]
+
+    # Bond universe, sorted by maturity
+    universe = bond_df.drop_duplicates(subset="ISIN").sort_values(by=["Maturity Date"])
+    maturities = universe["Maturity Date"].values.astype("datetime64[D]")
+    price_panel = bond_df.pivot(index="Date", columns="ISIN", values="Dirty")[universe["ISIN"]]
+    valuation_dates = price_panel.index.values.astype("datetime64[D]")
+
+    # Build the cash flow matrix once for the whole universe and fit all dates
+    cash_flow_dates, matrix = schedule.cash_flow_matrix(
+        universe["Coupon Rate"].to_numpy(), maturities, valuation_dates.min())
+    knot_dates, discount = fit_discount_factors(matrix, cash_flow_dates, maturities,
+                                                valuation_dates, price_panel.to_numpy())
+    spot_rates = spot_rates_at_maturity(knot_dates, discount, maturities, valuation_dates)
+
+    # Store results in the layout of bootstrapped_spot_rates.csv
+    spot_rate_df = pd.DataFrame(spot_rates, index=price_panel.index, columns=universe["ISIN"])
+    spot_rate_df = spot_rate_df.stack().rename("Spot Rate").reset_index()
+    spot_rate_df = spot_rate_df.merge(bond_df, on=["Date", "ISIN"])
+    spot_rate_df = spot_rate_df.rename(columns={"Name": "Bond Name"}).sort_values(
+        by=["Date", "Maturity Date"])
+    spot_rate_df = spot_rate_df[["Bond Name", "Coupon Rate", "Date", "Maturity Date", "Close",
+                                 "Spot Rate"]]
+    spot_rate_df.to_csv("cfm_spot_rates.csv", index=False)
+
+    print("Cash-flow-matrix spot rates saved to cfm_spot_rates.csv")
@@ -0,0 +1,63 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append("../Kernels")
+import curves
+import kernels
+import schedule
+
+
+def calc_spreads(bond_df, spot_df, ytm_df):
+    """
+    Compute the Z-spread over the bootstrapped spot curve and the I-spread over the YTM curve of
+    every bond and date in a panel.
+
+    :param bond_df: Bond panel in the layout of bond_selection.csv
+    :param spot_df: Spot curve in the layout of bootstrapped_spot_rates.csv
+    :param ytm_df: YTM curve in the layout of ytm.csv
+    :return: DataFrame with one row per bond and date
+    """
+    bond_df = bond_df.copy()
+    bond_df["Maturity Date"] = pd.to_datetime(bond_df["Maturity Date"], errors='coerce')
+    bond_df["Date"] = pd.to_datetime(bond_df["Date"], errors='coerce')
+    bond_df = bond_df[pd.notna(bond_df["Maturity Date"]) & pd.notna(bond_df["Date"]) &
+                      (bond_df["Maturity Date"] > bond_df["Date"])]
+    bond_df = bond_df.sort_values(by=["Date", "Maturity Date"]).reset_index(drop=True)
+
+    maturity = bond_df["Maturity Date"].values.astype("datetime64[D]")
+    current = bond_df["Date"].values.astype("datetime64[D]")
+    coupon_rates = bond_df["Coupon Rate"].to_numpy(dtype=float)
+    dates, date_index = np.unique(current, return_inverse=True)
+
+    # Cash flows on the coupon date grid, and the spot curve at every cash flow time
+    cash_flows, times = curves.bond_cash_flows(coupon_rates, maturity, current)
+    spot_years, spot_values = curves.curve_pillars(spot_df, "Spot Rate", dates)
+    spot_rates = curves.interpolate_curve(spot_years, spot_values, date_index, times)
+    z_spreads = curves.solve_z_spreads(cash_flows, times, spot_rates, bond_df["Dirty"].to_numpy())
+
+    # I-spread: bond YTM minus the YTM curve interpolated at the bond's maturity
+    _, n_periods = schedule.coupon_periods(maturity, current)
+    ytms = kernels.bond_ytm(bond_df["Close"].to_numpy(dtype=float), coupon_rates * 100, n_periods)
+    ytm_years, ytm_values = curves.curve_pillars(ytm_df, "YTM", dates)
+    years = (maturity - current).astype(int) / 365
+    i_spreads = ytms - curves.interpolate_curve(ytm_years, ytm_values, date_index, years)
+
+    return pd.DataFrame({
+        "Bond Name": bond_df["Name"], "ISIN": bond_df["ISIN"], "Date": bond_df["Date"],
+        "Maturity Date": bond_df["Maturity Date"], "YTM": ytms,
+        "Z-Spread": z_spreads, "I-Spread": i_spreads,
+    })
+
+
+if __name__ == "__main__":
+    # Load the bond panel and the curves it is measured against
+    bond_df = pd.read_csv("../Data Extract/bond_selection.csv")
+    spot_df = pd.read_csv("../Spot Curve/bootstrapped_spot_rates.csv")
+    ytm_df = pd.read_csv("../YTM Curve/ytm.csv")
+
+    spread_df = calc_spreads(bond_df, spot_df, ytm_df)
+    spread_df.to_csv("spreads.csv", index=False)
+
+    print("Z-spreads and I-spreads saved to spreads.csv")
@@ -1,8 +1,13 @@
 
+import sys
+
 import numpy as np
 import pandas as pd
 from dateutil.relativedelta import relativedelta
 
+sys.path.append("../Kernels")
+import kernels
+
 
 
 def generate_coupon_dates(maturity_day, current_day):
@@ -63,10 +68,7 @@ def bond_price(y, coupon, interval, face=100):
     coupon rate, time to maturity (in years), and face value.
     Assumes semi-annual compounding.
     """
-    N = len(interval)
-    price_calc = sum((coupon / 2) / ((1 + y / 2) ** i) for i in range(1, N+1))
-    price_calc += face / ((1 + y / 2) ** N)
-    return price_calc
+    return float(kernels.bond_price(y, coupon, len(interval), face))
 
 
 def bond_ytm(price, coupon, interval, face=100):
@@ -75,15 +77,8 @@ def bond_ytm(price, coupon, interval, face=100):
     that equates bond price to present value of future cash flows.
     Uses a brute-force search with linear interpolation.
     """
-    y_candidates = np.linspace(0.0, 0.20, 2001)  # Search for YTM between 0% and 20%
-    prices = [bond_price(y, coupon, interval, face) for y in y_candidates]
-
-    for i in range(len(prices) - 1):
-        if (prices[i] - price) * (prices[i+1] - price) < 0:  # Detect price crossing
-            # Linear interpolation to refine YTM
-            return y_candidates[i] + (y_candidates[i+1] - y_candidates[i]) * (price - prices[i]) / (prices[i+1] - prices[i])
-
-    return None  # Return None if no YTM found
+    ytm = float(kernels.bond_ytm(price, coupon, len(interval), face))
+    return None if np.isnan(ytm) else ytm  # Return None if no YTM found
 
 
 # Load bond dataset
@@ -100,25 +95,19 @@ bond_df["Maturity (Years)"] = (bond_df["Maturity Date"] - bond_df["Date"]).dt.da
 # Ensure correct sorting: by maturity date
 bond_df_sorted = bond_df.sort_values(by=["Maturity Date"], ascending=[True])
 
-# Compute YTM for each bond
-ytm_results = []
-
-# Iterate over each unique date to compute ytm
-for date in bond_df_sorted["Date"].unique():
-    daily_bond_data = bond_df_sorted[bond_df_sorted["Date"] == date]
-
-    ytm_results = []
-    for _, row in bond_df_sorted.iterrows():
-        price = row["Close"]
-        coupon = row["Coupon Rate"] * 100  # convert into coupon payment
-        maturity_day = row["Maturity Date"]
-        current_day = row["Date"]
-        interval = generate_time_periods(maturity_day, current_day)
+# Compute the number of remaining coupon periods of each bond
+n_periods = np.array([len(generate_time_periods(maturity_day, current_day))
+                      for maturity_day, current_day in zip(bond_df_sorted["Maturity Date"],
+                                                           bond_df_sorted["Date"])])
 
-        # Compute ytm
-        ytm = bond_ytm(price, coupon, interval)
+# Compute YTM for all bonds and dates at once
+# (coupon rate converted into coupon payment)
+ytms = kernels.bond_ytm(bond_df_sorted["Close"].to_numpy(),
+                        bond_df_sorted["Coupon Rate"].to_numpy() * 100, n_periods)
 
-        ytm_results.append([row["Name"], row["ISIN"], row["Date"], row["Maturity Date"], ytm])
+ytm_results = [[row["Name"], row["ISIN"], row["Date"], row["Maturity Date"],
+                None if np.isnan(ytm) else ytm]
+               for (_, row), ytm in zip(bond_df_sorted.iterrows(), ytms)]
 
 
 # Convert results to DataFrame and save